@@ -42,12 +42,20 @@ class QuestionSerializer(serializers.ModelSerializer):
 class QuestionListSerializer(serializers.ModelSerializer):
     """Simplified serializer for question lists (without answer)."""
     topic = serializers.StringRelatedField()
+    options = serializers.SerializerMethodField()
 
     class Meta:
         model = Question
         fields = [
             'id', 'topic', 'difficulty', 'question_text',
-            'code_example'
+            'code_example', 'options'
+        ]
+
+    def get_options(self, obj):
+        """Get formatted options."""
+        return [
+            {'letter': letter, 'text': text}
+            for letter, text in obj.get_options()
         ]
 
 
@@ -56,6 +64,11 @@ class AnswerSubmissionSerializer(serializers.Serializer):
     user_id = serializers.IntegerField()
     question_id = serializers.IntegerField()
     answer = serializers.CharField(max_length=1)
+    client_token = serializers.CharField(
+        max_length=40,
+        required=False,
+        help_text="Client-generated token; retries with the same token are recorded once"
+    )
 
     def validate_answer(self, value):
         """Validate answer is a valid option letter."""
@@ -72,6 +85,13 @@ class UserStatsSerializer(serializers.Serializer):
     topics = serializers.ListField(child=serializers.DictField())
 
 
+class LeaderboardSerializer(serializers.Serializer):
+    """Serializer for a leaderboard."""
+    topic_id = serializers.IntegerField(allow_null=True)
+    top = serializers.ListField(child=serializers.DictField())
+    me = serializers.DictField(allow_null=True)
+
+
 class TelegramUserSerializer(serializers.ModelSerializer):
     """Serializer for TelegramUser model."""
     current_topic_name = serializers.CharField(source='current_topic.name', read_only=True)
@@ -0,0 +1,117 @@
+"""API tests."""
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from questions.models import Topic, Question
+from bot.models import TelegramUser, QuestionHistory, UserProgress
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def make_user(topics, answered_per_topic=2):
+    user = TelegramUser.objects.create(
+        telegram_id=1000,
+        total_answered=answered_per_topic * len(topics),
+        total_correct=len(topics)
+    )
+    UserProgress.objects.bulk_create([
+        UserProgress(user=user, topic=topic, questions_attempted=answered_per_topic, questions_correct=1)
+        for topic in topics
+    ])
+    return user
+
+
+def make_topics(count):
+    return [Topic.objects.create(name=f"Stats topic {i}", order=100 + i) for i in range(count)]
+
+
+def get_stats(user):
+    response = APIClient().get('/api/users/stats/', {'user_id': user.telegram_id}, HTTP_HOST='localhost')
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize('topic_count', [1, 3, 8])
+def test_user_stats_query_count_does_not_grow_with_topics(topic_count, django_assert_num_queries):
+    user = make_user(make_topics(topic_count))
+
+    # The user, then all of their UserProgress rows
+    with django_assert_num_queries(2):
+        stats = get_stats(user)
+    assert [row['topic'] for row in stats['topics']] == [f"Stats topic {i}" for i in range(topic_count)]
+    assert all(row['attempted'] == 2 and row['accuracy'] == 50.0 for row in stats['topics'])
+
+    # Per-topic stats come from the cache
+    with django_assert_num_queries(1):
+        assert get_stats(user) == stats
+
+
+def test_user_stats_cache_follows_answer_counter():
+    topics = make_topics(2)
+    user = make_user(topics)
+    get_stats(user)
+
+    # Written by another process: its cache drop doesn't reach this one
+    UserProgress.objects.filter(user=user, topic=topics[0]).update(questions_attempted=3)
+    TelegramUser.objects.filter(pk=user.pk).update(total_answered=5)
+
+    assert get_stats(user)['topics'][0]['attempted'] == 3
+
+
+def test_question_batch_for_topic():
+    topics = make_topics(2)
+    user = TelegramUser.objects.create(telegram_id=1000, current_topic=topics[1])
+    questions = [
+        Question.objects.create(topic=topics[0], question_text=f"Q{i}", correct_option='A', explanation="")
+        for i in range(3)
+    ]
+    Question.objects.create(topic=topics[1], question_text="Other topic", correct_option='A', explanation="")
+
+    response = APIClient().get(
+        '/api/questions/batch/', {'user_id': user.telegram_id, 'topic_id': str(topics[0].id)}, HTTP_HOST='localhost'
+    )
+    assert response.status_code == 200
+    assert sorted(row['id'] for row in response.json()) == sorted(question.id for question in questions)
+
+
+def test_question_batch_rejects_non_numeric_topic():
+    TelegramUser.objects.create(telegram_id=1000)
+    response = APIClient().get('/api/questions/batch/', {'user_id': 1000, 'topic_id': 'abc'}, HTTP_HOST='localhost')
+    assert response.status_code == 400
+
+
+def test_rebuild_user_progress_from_history():
+    topics = make_topics(2)
+    user = TelegramUser.objects.create(telegram_id=1000, total_answered=3, total_correct=2)
+    questions = [
+        Question.objects.create(topic=topic, question_text="?", correct_option='A', explanation="")
+        for topic in topics
+    ]
+    QuestionHistory.objects.bulk_create([
+        QuestionHistory(user=user, question=questions[0], is_correct=True),
+        QuestionHistory(user=user, question=questions[0], is_correct=False),
+        QuestionHistory(user=user, question=questions[1], is_correct=True),
+    ])
+    # Stale row, e.g. from before answers through the API updated UserProgress
+    UserProgress.objects.create(user=user, topic=topics[0], questions_attempted=1, documentation_viewed=True)
+
+    call_command('rebuild_user_progress', stdout=StringIO())
+
+    progress = {
+        row.topic_id: row
+        for row in UserProgress.objects.filter(user=user)
+    }
+    assert (progress[topics[0].id].questions_attempted, progress[topics[0].id].questions_correct) == (2, 1)
+    assert progress[topics[0].id].documentation_viewed
+    assert (progress[topics[1].id].questions_attempted, progress[topics[1].id].questions_correct) == (1, 1)
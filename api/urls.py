@@ -13,7 +13,9 @@ urlpatterns = [
 
     # Custom API views
     path('questions/next/', views_drf.QuestionAPIView.as_view(), name='next_question'),
+    path('questions/batch/', views_drf.QuestionBatchAPIView.as_view(), name='question_batch'),
     path('questions/answer/', views_drf.AnswerQuestionAPIView.as_view(), name='answer_question'),
     path('code/task/', views_drf.CodeTaskAPIView.as_view(), name='code_task'),
     path('users/stats/', views_drf.UserStatsAPIView.as_view(), name='user_stats'),
+    path('leaderboard/', views_drf.LeaderboardAPIView.as_view(), name='leaderboard'),
 ]
@@ -5,11 +5,18 @@ from rest_framework.views import APIView
 
 from questions.models import Topic, Question
 from bot.models import TelegramUser, QuestionHistory
+from bot.answers import save_answer
+from bot.leaderboard import leaderboard, top_entries
+from bot.question_pool import question_pool
+from bot.selection import next_question_ids
+from bot.stats import topic_stats
 from .serializers import (
     TopicSerializer,
     QuestionSerializer,
+    QuestionListSerializer,
     AnswerSubmissionSerializer,
     UserStatsSerializer,
+    LeaderboardSerializer,
     CodeTaskSerializer,
 )
 
@@ -89,6 +96,82 @@ class QuestionAPIView(APIView):
         return Response(serializer.data)
 
 
+class QuestionBatchAPIView(APIView):
+    """
+    API view for getting the next batch of questions for user.
+    Answers are left out until the question is submitted.
+    """
+    DEFAULT_COUNT = 10
+    MAX_COUNT = 50
+
+    def get(self, request):
+        """Get the next ``count`` questions for user in one round trip."""
+        user_id = request.query_params.get('user_id')
+        topic_id = request.query_params.get('topic_id')
+
+        if not user_id:
+            return Response(
+                {'error': 'user_id parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            count = int(request.query_params.get('count', self.DEFAULT_COUNT))
+        except ValueError:
+            return Response(
+                {'error': 'count must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        count = max(1, min(count, self.MAX_COUNT))
+
+        if topic_id:
+            try:
+                topic_id = int(topic_id)
+            except ValueError:
+                return Response(
+                    {'error': 'topic_id must be an integer'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        # Get user
+        try:
+            user = TelegramUser.objects.get(telegram_id=user_id)
+        except TelegramUser.DoesNotExist:
+            return Response(
+                {'error': 'User not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Topic from the request, falling back to the user's current topic
+        if not (topic_id and Topic.objects.filter(id=topic_id).exists()):
+            topic_id = user.current_topic_id
+
+        question_ids = next_question_ids(
+            user.id,
+            count,
+            topic_id=topic_id,
+            difficulty=user.difficulty_level,
+            question_type='multiple_choice',
+            rating=user.rating
+        )
+
+        # Keep the selection order (due reviews first)
+        questions = Question.objects.filter(is_active=True).select_related('topic').in_bulk(question_ids)
+        if len(questions) < len(question_ids):
+            # Some were deactivated or deleted without reaching this process
+            question_pool.invalidate()
+        questions = [questions[qid] for qid in question_ids if qid in questions]
+
+        if not questions:
+            return Response(
+                {'error': 'No questions available'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        serializer = QuestionListSerializer(questions, many=True)
+        return Response(serializer.data)
+
+
 class AnswerQuestionAPIView(APIView):
     """
     API view for submitting answers to questions.
@@ -108,6 +191,7 @@ class AnswerQuestionAPIView(APIView):
         user_id = serializer.validated_data['user_id']
         question_id = serializer.validated_data['question_id']
         answer = serializer.validated_data['answer']
+        client_token = serializer.validated_data.get('client_token')
 
         # Get user and question
         try:
@@ -129,19 +213,17 @@ class AnswerQuestionAPIView(APIView):
         # Check if correct
         is_correct = answer == question.correct_option
 
-        # Record answer
-        QuestionHistory.objects.create(
-            user=user,
-            question=question,
-            is_correct=is_correct,
-            user_answer=answer
-        )
+        # Record answer (history, review card and progress)
+        idempotency_key = f"api:{user.id}:{client_token}" if client_token else None
+        recorded = save_answer(user, question, answer, is_correct, idempotency_key)
 
         return Response({
             'success': True,
+            'duplicate': not recorded,
             'is_correct': is_correct,
             'correct_option': question.correct_option,
             'explanation': question.explanation,
+            'documentation_link': question.documentation_link,
         })
 
 
@@ -169,24 +251,16 @@ class UserStatsAPIView(APIView):
             )
 
         # Get stats
-        history = QuestionHistory.objects.filter(user=user)
-        total = history.count()
-        correct = history.filter(is_correct=True).count()
+        total = user.total_answered
+        correct = user.total_correct
         accuracy = (correct / total * 100) if total > 0 else 0
 
-        # Per-topic stats
-        topics_stats = []
-        for topic in Topic.objects.all():
-            topic_history = history.filter(question__topic=topic)
-            topic_total = topic_history.count()
-            if topic_total > 0:
-                topic_correct = topic_history.filter(is_correct=True).count()
-                topics_stats.append({
-                    'topic': topic.name,
-                    'attempted': topic_total,
-                    'correct': topic_correct,
-                    'accuracy': round(topic_correct / topic_total * 100, 1)
-                })
+        # Per-topic stats (one cached UserProgress read)
+        topics_stats = [
+            {**row, 'accuracy': round(row['accuracy'], 1)}
+            for row in topic_stats(user)
+            if row['attempted'] > 0
+        ]
 
         stats_data = {
             'total_questions': total,
@@ -200,6 +274,47 @@ class UserStatsAPIView(APIView):
         return Response(serializer.data)
 
 
+class LeaderboardAPIView(APIView):
+    """
+    API view for the leaderboard (global or per topic).
+    """
+
+    MAX_LIMIT = 50
+
+    def get(self, request):
+        """Get the top users and, if user_id is given, that user's place."""
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), self.MAX_LIMIT)
+            topic_id = request.query_params.get('topic_id')
+            topic_id = int(topic_id) if topic_id else None
+        except ValueError:
+            return Response(
+                {'error': 'limit and topic_id must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        me = None
+        user_id = request.query_params.get('user_id')
+        if user_id:
+            user = TelegramUser.objects.filter(telegram_id=user_id).first()
+            if user is None:
+                return Response(
+                    {'error': 'User not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            place = leaderboard.rank(user.id, topic_id)
+            if place:
+                rank, score, total = place
+                me = {'rank': rank, 'correct_answers': score, 'total_users': total}
+
+        serializer = LeaderboardSerializer({
+            'topic_id': topic_id,
+            'top': top_entries(max(limit, 1), topic_id),
+            'me': me,
+        })
+        return Response(serializer.data)
+
+
 class CodeTaskAPIView(APIView):
     """
     API view for getting code challenge tasks.
@@ -1,10 +1,10 @@
 from django.contrib import admin
-from .models import TelegramUser, QuestionHistory, UserProgress
+from .models import TelegramUser, QuestionHistory, UserProgress, ReviewCard, QuestionStats, ActivityRollup, BotState
 
 
 @admin.register(TelegramUser)
 class TelegramUserAdmin(admin.ModelAdmin):
-    list_display = ('telegram_id', 'first_name', 'username', 'difficulty_level', 'current_topic', 'created_at')
+    list_display = ('telegram_id', 'first_name', 'username', 'difficulty_level', 'rating', 'total_answered', 'total_correct', 'current_topic', 'created_at')
     list_filter = ('difficulty_level', 'current_topic', 'created_at')
     search_fields = ('telegram_id', 'username', 'first_name', 'last_name')
     ordering = ('-created_at',)
@@ -30,3 +30,35 @@ class UserProgressAdmin(admin.ModelAdmin):
     def accuracy(self, obj):
         return f"{obj.accuracy:.1f}%"
     accuracy.short_description = 'Accuracy'
+
+
+@admin.register(ReviewCard)
+class ReviewCardAdmin(admin.ModelAdmin):
+    list_display = ('user', 'question', 'due_at', 'interval', 'repetitions', 'ease')
+    list_filter = ('question__topic', 'repetitions')
+    search_fields = ('user__username', 'user__first_name', 'question__question_text')
+    ordering = ('due_at',)
+
+
+@admin.register(QuestionStats)
+class QuestionStatsAdmin(admin.ModelAdmin):
+    list_display = ('question', 'answers', 'p_value', 'discrimination', 'option_rates', 'computed_at')
+    list_filter = ('question__topic', 'question__difficulty')
+    search_fields = ('question__question_text',)
+    ordering = ('discrimination',)
+    readonly_fields = ('question', 'answers', 'p_value', 'discrimination', 'option_rates', 'computed_at')
+
+
+@admin.register(ActivityRollup)
+class ActivityRollupAdmin(admin.ModelAdmin):
+    list_display = ('period', 'bucket', 'topic', 'difficulty', 'answers', 'correct', 'users')
+    list_filter = ('period', 'topic', 'difficulty')
+    date_hierarchy = 'bucket'
+    ordering = ('-bucket',)
+
+
+@admin.register(BotState)
+class BotStateAdmin(admin.ModelAdmin):
+    list_display = ('scope', 'key', 'updated_at')
+    list_filter = ('scope',)
+    search_fields = ('key',)
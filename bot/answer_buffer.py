@@ -0,0 +1,220 @@
+"""Write-behind buffer for answer events."""
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.db import DataError, IntegrityError
+
+from .answers import AnswerEvent, persist_answers
+from .db_executor import db_sync_to_async
+from .idempotency import recent_answer_keys
+from .models import QuestionHistory
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(event):
+    data = event._asdict()
+    data['answered_at'] = event.answered_at.isoformat()
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _decode(line):
+    data = json.loads(line)
+    data['answered_at'] = datetime.fromisoformat(data['answered_at'])
+    return AnswerEvent(**data)
+
+
+class AnswerBuffer:
+    """
+    Queues answer events in memory and writes them in batches.
+
+    A batch is flushed every ``flush_interval`` seconds or as soon as
+    ``max_events`` are pending. Every event is first appended to a local
+    log; the log is rotated when a batch is taken and the rotated file is
+    deleted only after the batch is committed, so a restart replays
+    whatever did not reach the DB.
+
+    Events the DB rejects (say, an answer to a question deleted in the
+    meantime) are moved to a dead-letter log next to the log
+    (``answers.rejected.log`` for ``answers.log``) so they can't block the
+    rest; failures like a lost connection keep the batch for the next flush.
+
+    Only used while started (by the bot's event loop); until then answers
+    are written synchronously.
+    """
+
+    def __init__(self, log_path=None, max_events=None, flush_interval=None):
+        self._log_path = log_path
+        self._max_events = max_events
+        self._flush_interval = flush_interval
+        self._pending = []
+        self._log = None
+        self._rotated = []
+        self._flush_lock = None
+        self._task = None
+        self._flush_task = None
+        self.running = False
+
+    @property
+    def log_path(self):
+        return str(self._log_path or settings.ANSWER_BUFFER_LOG_PATH)
+
+    @property
+    def dead_letter_path(self):
+        root, ext = os.path.splitext(self.log_path)
+        return f"{root}.rejected{ext}"
+
+    @property
+    def max_events(self):
+        return self._max_events or settings.ANSWER_BUFFER_MAX_EVENTS
+
+    @property
+    def flush_interval(self):
+        return self._flush_interval or settings.ANSWER_BUFFER_FLUSH_INTERVAL
+
+    def _open_log(self):
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        self._log = open(self.log_path, 'a', encoding='utf-8')
+
+    def _rotate_log(self):
+        self._log.close()
+        rotated = f"{self.log_path}.{time.time_ns()}"
+        os.replace(self.log_path, rotated)
+        self._rotated.append(rotated)
+        self._open_log()
+
+    def submit(self, event):
+        """Queue an event; it is durable in the local log once this returns."""
+        self._log.write(_encode(event) + '\n')
+        self._log.flush()
+        if getattr(settings, 'ANSWER_BUFFER_FSYNC', False):
+            os.fsync(self._log.fileno())
+
+        self._pending.append(event)
+        if len(self._pending) >= self.max_events and self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    def _dead_letter(self, event, error):
+        logger.error("Answer rejected by the DB, moved to %s: %s (%s)", self.dead_letter_path, event, error)
+        with open(self.dead_letter_path, 'a', encoding='utf-8') as log:
+            log.write(_encode(event) + '\n')
+
+    def _persist(self, events):
+        """
+        ``persist_answers``, setting aside the events the DB rejects.
+
+        A batch failing with an IntegrityError or DataError is split in
+        halves until the rejected events are isolated; those go to the
+        dead-letter log and the rest is written. Other errors propagate.
+        """
+        try:
+            return persist_answers(events)
+        except (IntegrityError, DataError) as error:
+            if len(events) == 1:
+                self._dead_letter(events[0], error)
+                return 0
+        middle = len(events) // 2
+        return self._persist(events[:middle]) + self._persist(events[middle:])
+
+    async def flush(self):
+        """Write all pending events to the DB."""
+        async with self._flush_lock:
+            self._flush_task = None
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            self._rotate_log()
+            try:
+                await db_sync_to_async(self._persist)(batch)
+            except Exception:
+                # Keep the events (and their rotated logs) for the next attempt
+                logger.exception("Failed to flush %d answers", len(batch))
+                self._pending = batch + self._pending
+                return
+
+            for path in self._rotated:
+                os.remove(path)
+            self._rotated = []
+
+    async def _replay(self):
+        """
+        Persist events left in the log by a previous run. If the DB can't be
+        reached, they are kept as pending and retried by the flush loop.
+        """
+        if os.path.exists(self.log_path):
+            os.replace(self.log_path, f"{self.log_path}.{time.time_ns()}")
+        # Rotated logs end in a timestamp
+        paths = sorted(
+            path for path in glob.glob(f"{glob.escape(self.log_path)}.*")
+            if path.rpartition('.')[2].isdigit()
+        )
+
+        events = []
+        for path in paths:
+            with open(path, encoding='utf-8') as log:
+                for line in log:
+                    if not line.strip():
+                        continue
+                    try:
+                        events.append(_decode(line))
+                    except (ValueError, TypeError):
+                        # Cut short by a crash mid-write
+                        logger.error("Skipping unreadable line in %s: %r", path, line)
+        if events:
+            logger.info("Replaying %d buffered answers from %s", len(events), self.log_path)
+            try:
+                await db_sync_to_async(self._persist)(events)
+            except Exception:
+                logger.exception("Failed to replay %d answers, retrying with the next flush", len(events))
+                self._pending = events
+                self._rotated = paths
+                return
+        for path in paths:
+            os.remove(path)
+
+    def _recent_keys(self):
+        keys = (
+            QuestionHistory.objects.exclude(idempotency_key=None)
+            .order_by('-id').values_list('idempotency_key', flat=True)[:recent_answer_keys.maxsize]
+        )
+        return list(reversed(keys))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def start(self):
+        """
+        Replay the log and start periodic flushing.
+
+        The latest stored answer keys are loaded first, so repeats of answers
+        recorded before a restart are caught before their in-memory effects
+        are applied (not only by the unique constraint at flush time).
+        """
+        await self._replay()
+        recent_answer_keys.preload(await db_sync_to_async(self._recent_keys)())
+        self._flush_lock = asyncio.Lock()
+        self._open_log()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self.running = True
+
+    async def stop(self):
+        """Flush what is left and stop."""
+        if not self.running:
+            return
+        self.running = False
+        # Stop the loop between flushes, never in the middle of one
+        async with self._flush_lock:
+            self._task.cancel()
+        await self.flush()
+        self._log.close()
+
+
+answer_buffer = AnswerBuffer()
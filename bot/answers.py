@@ -0,0 +1,215 @@
+"""Recording of user answers."""
+from collections import namedtuple
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from questions.models import Question
+from .models import TelegramUser, QuestionHistory, ReviewCard
+from .idempotency import recent_answer_keys
+from .leaderboard import leaderboard
+from .progress import upsert_progress
+from .question_pool import question_pool
+from .rating import rating_changes
+from .stats import invalidate_topic_stats
+
+# Everything needed to persist one answer; plain values so it can be logged as JSON
+AnswerEvent = namedtuple('AnswerEvent', [
+    'user_id', 'question_id', 'topic_id', 'user_answer', 'is_correct',
+    'answered_at', 'user_delta', 'question_delta', 'idempotency_key',
+], defaults=(None,))
+
+
+def claim_answer_key(idempotency_key):
+    """Return False if an answer with this key was already submitted."""
+    if idempotency_key is None:
+        return True
+    return recent_answer_keys.claim(idempotency_key)
+
+
+def make_answer_event(user, question, user_answer, is_correct, idempotency_key=None):
+    """Build the event for an answer; nothing is changed until it is applied."""
+    user_delta, question_delta = rating_changes(user.rating, question.rating, is_correct)
+    return AnswerEvent(
+        user_id=user.id,
+        question_id=question.id,
+        topic_id=question.topic_id,
+        user_answer=user_answer,
+        is_correct=is_correct,
+        answered_at=timezone.now(),
+        user_delta=user_delta,
+        question_delta=question_delta,
+        idempotency_key=idempotency_key,
+    )
+
+
+def apply_answer_event(user, question, event):
+    """
+    Apply an answer's in-memory effects: the question pool, the leaderboards
+    and the passed ``user``/``question`` objects. The DB is only touched by
+    ``persist_answers``.
+    """
+    user.rating += event.user_delta
+    user.total_answered += 1
+    user.total_correct += int(event.is_correct)
+    question.rating += event.question_delta
+    question_pool.mark_seen(user.id, question.id)
+    question_pool.adjust_rating(question.id, event.question_delta)
+    leaderboard.record(user.id, question.topic_id, event.is_correct)
+
+
+def _review_cards(events):
+    """Reschedule the review cards of a batch: one read, one insert, one update."""
+    users = {event.user_id for event in events}
+    questions = {event.question_id for event in events}
+    cards = {
+        (card.user_id, card.question_id): card
+        for card in ReviewCard.objects.filter(user_id__in=users, question_id__in=questions)
+    }
+
+    new_cards = {}
+    changed = {}
+    for event in events:
+        key = (event.user_id, event.question_id)
+        card = cards.get(key)
+        if card is None:
+            card = cards[key] = new_cards[key] = ReviewCard(
+                user_id=event.user_id,
+                question_id=event.question_id,
+                due_at=event.answered_at
+            )
+        elif key not in new_cards:
+            changed[key] = card
+        card.review(event.is_correct, now=event.answered_at)
+
+    ReviewCard.objects.bulk_create(new_cards.values())
+    ReviewCard.objects.bulk_update(changed.values(), ['due_at', 'interval', 'ease', 'repetitions'])
+
+
+def _apply_progress(events):
+    """Add the batch's attempts and correct answers to UserProgress."""
+    increments = {}
+    for event in events:
+        attempted, correct = increments.get((event.user_id, event.topic_id), (0, 0))
+        increments[(event.user_id, event.topic_id)] = (attempted + 1, correct + int(event.is_correct))
+
+    upsert_progress(
+        (user_id, topic_id, attempted, correct, False)
+        for (user_id, topic_id), (attempted, correct) in increments.items()
+    )
+
+
+def _apply_users(events):
+    """Add the batch's rating deltas and answer counts to each user row."""
+    totals = {}
+    for event in events:
+        delta, answered, correct = totals.get(event.user_id, (0, 0, 0))
+        totals[event.user_id] = (delta + event.user_delta, answered + 1, correct + int(event.is_correct))
+
+    # One read and one UPDATE; rows are locked in id order to avoid deadlocks
+    users = list(
+        TelegramUser.objects.select_for_update()
+        .filter(id__in=totals).order_by('id')
+        .only('rating', 'total_answered', 'total_correct')
+    )
+    for user in users:
+        delta, answered, correct = totals[user.id]
+        user.rating += delta
+        user.total_answered += answered
+        user.total_correct += correct
+    TelegramUser.objects.bulk_update(users, ['rating', 'total_answered', 'total_correct'])
+
+
+def _apply_question_ratings(events):
+    """Add the batch's rating deltas to each question row."""
+    deltas = {}
+    for event in events:
+        deltas[event.question_id] = deltas.get(event.question_id, 0) + event.question_delta
+
+    questions = list(Question.objects.select_for_update().filter(id__in=deltas).order_by('id').only('rating'))
+    for question in questions:
+        question.rating += deltas[question.id]
+    Question.objects.bulk_update(questions, ['rating'])
+
+
+def _write_answers(events):
+    with transaction.atomic():
+        # Users first: every writer (see rebuild_answer_counters and
+        # rebuild_user_progress) locks the user rows before anything else
+        _apply_users(events)
+        QuestionHistory.objects.bulk_create([
+            QuestionHistory(
+                user_id=event.user_id,
+                question_id=event.question_id,
+                is_correct=event.is_correct,
+                user_answer=event.user_answer,
+                answered_at=event.answered_at,
+                idempotency_key=event.idempotency_key
+            )
+            for event in events
+        ])
+        _review_cards(events)
+        _apply_progress(events)
+        _apply_question_ratings(events)
+        user_ids = {event.user_id for event in events}
+        transaction.on_commit(lambda: invalidate_topic_stats(user_ids))
+
+
+def persist_answers(events):
+    """
+    Write a batch of answer events in one transaction.
+
+    History rows are bulk-inserted; review cards, progress upserts, answer
+    counters and rating deltas are grouped so a batch costs a handful of statements
+    regardless of its size.
+
+    Events whose idempotency key is already stored are dropped. That is
+    detected by the unique constraint, so the common case needs no extra
+    SELECT. Returns the number of events written.
+    """
+    if not events:
+        return 0
+
+    try:
+        _write_answers(events)
+        return len(events)
+    except IntegrityError:
+        keys = [event.idempotency_key for event in events if event.idempotency_key]
+        if not keys:
+            raise
+
+    # Some keys are duplicates: drop them (and repeats inside the batch), then retry
+    stored = set(QuestionHistory.objects.filter(idempotency_key__in=keys).values_list('idempotency_key', flat=True))
+    fresh = []
+    for event in events:
+        if event.idempotency_key in stored:
+            continue
+        if event.idempotency_key:
+            stored.add(event.idempotency_key)
+        fresh.append(event)
+    if fresh:
+        _write_answers(fresh)
+    return len(fresh)
+
+
+def save_answer(user, question, user_answer, is_correct, idempotency_key=None):
+    """
+    Record a user's answer to a question.
+    Used by both the bot and the Mini App API.
+
+    Returns False if an answer with the same ``idempotency_key`` was
+    already recorded; its in-memory effects are applied only once the
+    answer is stored.
+    """
+    if not claim_answer_key(idempotency_key):
+        return False
+    event = make_answer_event(user, question, user_answer, is_correct, idempotency_key)
+    try:
+        recorded = persist_answers([event]) == 1
+    except Exception:
+        if idempotency_key is not None:
+            recent_answer_keys.release(idempotency_key)
+        raise
+    if recorded:
+        apply_answer_event(user, question, event)
+    return recorded
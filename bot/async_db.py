@@ -0,0 +1,182 @@
+"""
+Async ORM versions of the bot's hot helpers (enabled with BOT_ASYNC_ORM).
+
+Same signatures and results as the helpers in bot/utils.py. Cache hits
+are served without leaving the event loop and misses use Django's async
+ORM. Writes that need a transaction (``save_answer``) have no async ORM
+equivalent and still go through the DB pool.
+"""
+from django.db import connection
+
+from .broadcast import broadcast
+from .db_executor import db_sync_to_async
+from .models import TelegramUser, UserProgress
+from .profile_sync import profile_sync
+from .progress import upsert_progress
+from .question_cache import question_cache
+from .question_pool import question_pool
+from .question_queue import STALE_QUESTION_RETRIES, question_queue
+from .selection import due_cards, question_context_annotations
+from .stats import atopic_stats
+from .topic_cache import CHANNEL as TOPICS_CHANNEL, topic_cache
+from .user_cache import user_cache
+
+
+async def _create_user(telegram_user):
+    user, created = await TelegramUser.objects.aget_or_create(
+        telegram_id=telegram_user.id,
+        defaults={
+            'username': telegram_user.username,
+            'first_name': telegram_user.first_name,
+            'last_name': telegram_user.last_name,
+            'language_code': telegram_user.language_code,
+            'is_bot': telegram_user.is_bot,
+            'current_topic': await db_sync_to_async(topic_cache.default)()
+        }
+    )
+    if not created:
+        # Created concurrently by another update
+        user = await TelegramUser.objects.select_related('current_topic').aget(telegram_id=telegram_user.id)
+    return user, created
+
+
+async def _remember(user, telegram_user):
+    user_cache.put(user)
+    if profile_sync.running:
+        profile_sync.observe(user, telegram_user)
+    else:
+        # Saves right away
+        await db_sync_to_async(profile_sync.observe)(user, telegram_user)
+
+
+async def get_or_create_user(telegram_user):
+    """Get or create a TelegramUser from telegram.User object."""
+    broadcast.check(TOPICS_CHANNEL)
+    user = user_cache.get(telegram_user.id)
+    created = False
+    if user is None:
+        user = await TelegramUser.objects.select_related('current_topic').filter(telegram_id=telegram_user.id).afirst()
+    if user is None:
+        user, created = await _create_user(telegram_user)
+    await _remember(user, telegram_user)
+    return user, created
+
+
+async def load_question_context(telegram_user):
+    """The user, documentation-viewed flag and due question for ``/next`` in one query."""
+    broadcast.check(TOPICS_CHANNEL)
+    annotations = question_context_annotations()
+    user = user_cache.get(telegram_user.id)
+    row = None
+    if user is not None:
+        row = await TelegramUser.objects.filter(pk=user.pk).annotate(**annotations).values_list(*annotations).afirst()
+    if row is None:
+        user = await (
+            TelegramUser.objects.select_related('current_topic')
+            .annotate(**annotations)
+            .filter(telegram_id=telegram_user.id)
+            .afirst()
+        )
+        if user is not None:
+            row = tuple(user.__dict__.pop(name) for name in annotations)
+    if user is None:
+        user, _ = await _create_user(telegram_user)
+        row = (False, None)
+    await _remember(user, telegram_user)
+
+    documentation_viewed, due_question_id = row
+    return {
+        'user': user,
+        'documentation_viewed': bool(documentation_viewed),
+        'due_question': await question_cache.aget(due_question_id) if due_question_id else None,
+    }
+
+
+async def get_due_question(user, topic=None, difficulty=None):
+    """Get the most overdue question the user should review, if any."""
+    cards = due_cards(
+        user.id,
+        topic_id=topic.id if topic else None,
+        difficulty=difficulty
+    )
+    card = await cards.select_related('question__topic').afirst()
+    return card.question if card else None
+
+
+async def get_question(question_id):
+    """Get an active question by id (served from the question cache)."""
+    return await question_cache.aget(question_id)
+
+
+async def get_next_question(user, topic=None, difficulty=None):
+    """Get the next question for a user: due reviews first, then new questions."""
+    if topic is None:
+        topic = user.current_topic
+    if difficulty is None:
+        difficulty = user.difficulty_level
+
+    question = await get_due_question(user, topic, difficulty)
+    if question:
+        return question
+    return await get_new_question(user, topic, difficulty)
+
+
+async def get_new_question(user, topic=None, difficulty=None):
+    """Get a question the user hasn't seen, from their prefetched queue."""
+    if topic is None:
+        topic = user.current_topic
+    if difficulty is None:
+        difficulty = user.difficulty_level
+
+    for _ in range(STALE_QUESTION_RETRIES):
+        question_id = await question_queue.next_question_id(
+            user.id,
+            topic_id=topic.id if topic else None,
+            difficulty=difficulty,
+            rating=user.rating
+        )
+        if question_id is None:
+            return None
+        question = await get_question(question_id)
+        if question is not None:
+            return question
+        # Deactivated or deleted since it was queued: reload the pool and try again
+        question_pool.invalidate()
+        question_queue.invalidate(user.id)
+    return None
+
+
+async def get_user_stats(user):
+    """Get statistics for a user."""
+    total_questions = user.total_answered
+    correct_answers = user.total_correct
+
+    return {
+        'total_questions': total_questions,
+        'correct_answers': correct_answers,
+        'accuracy': (correct_answers / total_questions * 100) if total_questions > 0 else 0,
+        'topics': await atopic_stats(user)
+    }
+
+
+async def check_documentation_viewed(user, topic):
+    """Check if user has viewed documentation for a topic."""
+    viewed = await (
+        UserProgress.objects.filter(user=user, topic=topic)
+        .values_list('documentation_viewed', flat=True)
+        .afirst()
+    )
+    return bool(viewed)
+
+
+async def mark_documentation_viewed(user, topic):
+    """Mark documentation as viewed for a topic."""
+    if not connection.features.supports_update_conflicts_with_target:
+        await db_sync_to_async(upsert_progress)([(user.id, topic.id, 0, 0, True)])
+        return
+    await UserProgress.objects.abulk_create(
+        [UserProgress(user=user, topic=topic, documentation_viewed=True)],
+        update_conflicts=True,
+        unique_fields=['user', 'topic'],
+        update_fields=['documentation_viewed', 'last_activity']
+    )
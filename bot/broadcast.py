@@ -0,0 +1,121 @@
+"""Cross-process invalidation of in-process caches."""
+import logging
+import os
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class Broadcast:
+    """
+    Tells every bot and web process that a named cache is stale.
+
+    On PostgreSQL a change is sent with NOTIFY once the transaction commits.
+    Each process runs a daemon thread that LISTENs and calls the callbacks
+    subscribed to the channel. That thread is started by the first
+    ``check``, so management commands that never read a cache don't open
+    the extra connection.
+
+    Other backends fall back to a stamp file per channel in
+    ``CACHE_STAMP_DIR``. The lite deployment runs everything in one
+    container, so all processes share that file. Publishing touches it, and
+    ``check`` compares its mtime, which costs a stat call and no query.
+    """
+
+    CHANNEL_PREFIX = 'cache_'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._callbacks = {}  # channel -> [callback]
+        self._stamps = {}  # channel -> last seen mtime (file mode)
+        self._listener = None
+
+    @property
+    def uses_notify(self):
+        return connection.vendor == 'postgresql'
+
+    def _stamp_path(self, channel):
+        stamp_dir = getattr(settings, 'CACHE_STAMP_DIR', settings.BASE_DIR / 'data')
+        return os.path.join(stamp_dir, f"{channel}.stamp")
+
+    def _stamp(self, channel):
+        try:
+            return os.stat(self._stamp_path(channel)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def subscribe(self, channel, callback):
+        """Call ``callback()`` whenever another process publishes on ``channel``."""
+        with self._lock:
+            self._callbacks.setdefault(channel, []).append(callback)
+            self._stamps.setdefault(channel, self._stamp(channel))
+
+    def _dispatch(self, channel):
+        for callback in self._callbacks.get(channel, ()):
+            callback()
+
+    def publish(self, channel):
+        """Announce a change to all processes after the current transaction commits."""
+        transaction.on_commit(lambda: self._send(channel))
+
+    def _send(self, channel):
+        if self.uses_notify:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, '')", [self.CHANNEL_PREFIX + channel])
+            return
+        path = self._stamp_path(channel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a'):
+            os.utime(path, None)
+
+    def check(self, channel):
+        """Apply changes published by other processes; call before reading a cache."""
+        if self.uses_notify:
+            self._start_listener()
+            return
+        stamp = self._stamp(channel)
+        with self._lock:
+            changed = stamp != self._stamps.get(channel)
+            self._stamps[channel] = stamp
+        if changed:
+            self._dispatch(channel)
+
+    def _start_listener(self):
+        if self._listener is not None:
+            return
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='cache-broadcast', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                db = connections['default']
+                db.ensure_connection()
+                raw = db.connection
+                with raw.cursor() as cursor:
+                    for channel in list(self._callbacks):
+                        cursor.execute(f'LISTEN "{self.CHANNEL_PREFIX}{channel}"')
+                # Anything may have changed while we weren't listening
+                for channel in list(self._callbacks):
+                    self._dispatch(channel)
+
+                while True:
+                    select.select([raw], [], [], 60)
+                    raw.poll()
+                    while raw.notifies:
+                        notify = raw.notifies.pop(0)
+                        self._dispatch(notify.channel[len(self.CHANNEL_PREFIX):])
+            except Exception:
+                logger.exception("Cache broadcast listener failed, reconnecting")
+                connections['default'].close()
+                time.sleep(5)
+
+
+broadcast = Broadcast()
@@ -0,0 +1,152 @@
+"""Memory-bounded user_data/chat_data for the bot application."""
+import sys
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from types import MappingProxyType
+
+from django.conf import settings
+from telegram.ext import Application
+
+
+def approx_size(obj, depth=4):
+    """Rough size in bytes of ``obj`` and what it contains (``depth`` levels deep)."""
+    size = sys.getsizeof(obj)
+    if depth:
+        if isinstance(obj, dict):
+            size += sum(approx_size(k, depth - 1) + approx_size(v, depth - 1) for k, v in obj.items())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            size += sum(approx_size(item, depth - 1) for item in obj)
+    return size
+
+
+class BoundedDataStore(MutableMapping):
+    """
+    Drop-in for the ``defaultdict`` PTB keeps user_data/chat_data in,
+    holding at most ``max_entries`` entries.
+
+    Like a defaultdict, reading a missing key creates an empty entry. The
+    least recently used entries beyond ``max_entries`` are evicted and
+    handed to ``on_evict(key, data)``, which can spill them to storage.
+    Entries for which ``in_use(key)`` is true (a handler may still be
+    working on them) are skipped; the store can then exceed
+    ``max_entries`` until they are released.
+    """
+
+    def __init__(self, default_factory, max_entries, on_evict=None, in_use=None):
+        self.default_factory = default_factory
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+        self.in_use = in_use
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __getitem__(self, key):
+        try:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        except KeyError:
+            data = self._entries[key] = self.default_factory()
+            self._evict()
+            return data
+
+    def __setitem__(self, key, data):
+        self._entries[key] = data
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def __delitem__(self, key):
+        del self._entries[key]
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        return self._entries.get(key, default)
+
+    def pop(self, key, *default):
+        return self._entries.pop(key, *default)
+
+    def _evict(self):
+        excess = len(self._entries) - self.max_entries
+        if excess <= 0:
+            return
+        victims = []
+        for key in self._entries:
+            if self.in_use is None or not self.in_use(key):
+                victims.append(key)
+                if len(victims) == excess:
+                    break
+        for key in victims:
+            data = self._entries.pop(key)
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(key, data)
+
+    def metrics(self):
+        """Resident entries and their approximate size."""
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'approx_bytes': sum(approx_size(data) for data in self._entries.values()),
+            'evictions': self.evictions,
+        }
+
+
+class BoundedApplication(Application):
+    """
+    Application keeping user_data and chat_data in ``BoundedDataStore``s
+    of ``BOT_DATA_CACHE_SIZE`` entries each, so memory stays flat however
+    many users write to the bot.
+
+    With a persistence that can ``spill`` (``DBPersistence``), evicted
+    entries are queued for writing and loaded again on the user's next
+    update; without one they are dropped. With an update processor that
+    reports ``in_flight`` updates (``PerUserUpdateProcessor``), entries of
+    users and chats with updates queued or running are never evicted.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        max_entries = getattr(settings, 'BOT_DATA_CACHE_SIZE', 10000)
+        self._user_data = BoundedDataStore(
+            self.context_types.user_data, max_entries, self._evict_user, self._user_in_use
+        )
+        self._chat_data = BoundedDataStore(
+            self.context_types.chat_data, max_entries, self._evict_chat, self._chat_in_use
+        )
+        self.user_data = MappingProxyType(self._user_data)
+        self.chat_data = MappingProxyType(self._chat_data)
+
+    def _user_in_use(self, user_id):
+        in_flight = getattr(self.update_processor, 'in_flight', None)
+        return in_flight is not None and in_flight(user_id=user_id)
+
+    def _chat_in_use(self, chat_id):
+        in_flight = getattr(self.update_processor, 'in_flight', None)
+        return in_flight is not None and in_flight(chat_id=chat_id)
+
+    def _spill(self, scope, key, data):
+        if self.persistence is not None and hasattr(self.persistence, 'spill'):
+            self.persistence.spill(scope, key, data)
+
+    def _evict_user(self, user_id, data):
+        # The spilled copy is the latest, don't write an empty entry for it later
+        self._user_ids_to_be_updated_in_persistence.discard(user_id)
+        self._spill('user', user_id, data)
+
+    def _evict_chat(self, chat_id, data):
+        self._chat_ids_to_be_updated_in_persistence.discard(chat_id)
+        self._spill('chat', chat_id, data)
+
+    def data_metrics(self):
+        """Resident user_data/chat_data entries and their approximate size."""
+        return {
+            'user_data': self._user_data.metrics(),
+            'chat_data': self._chat_data.metrics(),
+        }
@@ -0,0 +1,90 @@
+"""Thread pool for the bot's database access."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+class DBExecutor(ThreadPoolExecutor):
+    """
+    Runs the bot's ORM calls on ``BOT_DB_POOL_SIZE`` worker threads.
+
+    ``sync_to_async`` with the default ``thread_sensitive=True`` runs every
+    call on one shared thread, so DB work of all users is serialized. Here
+    each worker keeps its own connection (Django connections are per thread)
+    and reuses it between calls; ``close_old_connections`` before each call
+    recycles it after ``CONN_MAX_AGE`` or an error, as the request cycle does
+    for views.
+
+    ``metrics()`` reports the pool size, calls waiting for a worker and the
+    time spent waiting and running.
+    """
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers=max_workers, thread_name_prefix='bot-db')
+        self._metrics_lock = threading.Lock()
+        self._waiting = 0
+        self._active = 0
+        self._reset_timings()
+
+    def _reset_timings(self):
+        self._calls = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._run_max = 0.0
+
+    def submit(self, fn, /, *args, **kwargs):
+        submitted = time.monotonic()
+        with self._metrics_lock:
+            self._waiting += 1
+
+        def call():
+            started = time.monotonic()
+            with self._metrics_lock:
+                self._waiting -= 1
+                self._active += 1
+            try:
+                close_old_connections()
+                return fn(*args, **kwargs)
+            finally:
+                finished = time.monotonic()
+                with self._metrics_lock:
+                    self._active -= 1
+                    self._calls += 1
+                    self._wait_total += started - submitted
+                    self._wait_max = max(self._wait_max, started - submitted)
+                    self._run_total += finished - started
+                    self._run_max = max(self._run_max, finished - started)
+
+        return super().submit(call)
+
+    def metrics(self, reset=False):
+        """Pool load and call timings (since the last reset)."""
+        with self._metrics_lock:
+            calls = self._calls
+            metrics = {
+                'pool_size': self._max_workers,
+                'threads': len(self._threads),
+                'active': self._active,
+                'waiting': self._waiting,
+                'calls': calls,
+                'wait_avg_ms': round(self._wait_total / calls * 1000, 1) if calls else 0.0,
+                'wait_max_ms': round(self._wait_max * 1000, 1),
+                'call_avg_ms': round(self._run_total / calls * 1000, 1) if calls else 0.0,
+                'call_max_ms': round(self._run_max * 1000, 1),
+            }
+            if reset:
+                self._reset_timings()
+        return metrics
+
+
+db_executor = DBExecutor(getattr(settings, 'BOT_DB_POOL_SIZE', 4))
+
+
+def db_sync_to_async(func):
+    """``sync_to_async`` running ``func`` on the bot's DB pool."""
+    return sync_to_async(func, thread_sensitive=False, executor=db_executor)
@@ -0,0 +1,52 @@
+"""Bounded in-memory record of recently used idempotency keys."""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class RecentKeys:
+    """
+    LRU set of the most recent keys.
+
+    Catches repeats (double taps, client retries) without touching the DB;
+    keys that already fell out are still rejected by the unique constraint
+    on ``QuestionHistory.idempotency_key``.
+    """
+
+    def __init__(self, maxsize=None):
+        self._maxsize = maxsize
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def maxsize(self):
+        return self._maxsize or getattr(settings, 'IDEMPOTENCY_CACHE_SIZE', 10000)
+
+    def claim(self, key):
+        """Remember ``key``; return False if it was already seen."""
+        with self._lock:
+            if key in self._keys:
+                self._keys.move_to_end(key)
+                return False
+            self._keys[key] = None
+            while len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+            return True
+
+    def preload(self, keys):
+        """Remember ``keys`` (newest last), e.g. the latest stored ones on startup."""
+        with self._lock:
+            for key in keys:
+                self._keys[key] = None
+                self._keys.move_to_end(key)
+            while len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+
+    def release(self, key):
+        """Forget ``key`` so a failed attempt can be retried."""
+        with self._lock:
+            self._keys.pop(key, None)
+
+
+recent_answer_keys = RecentKeys()
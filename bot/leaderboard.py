@@ -0,0 +1,161 @@
+"""In-memory leaderboards by number of correct answers."""
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connection
+
+from .models import TelegramUser, UserProgress
+
+GLOBAL = None
+
+
+class _Board:
+    """Scores of one scope, plus the same entries as a sorted array of (-score, user_id)."""
+    __slots__ = ('scores', 'order')
+
+    def __init__(self):
+        self.scores = {}
+        self.order = []
+
+    def add(self, user_id, delta):
+        score = self.scores.get(user_id, 0)
+        if score:
+            del self.order[bisect_left(self.order, (-score, user_id))]
+        score += delta
+        self.scores[user_id] = score
+        insort(self.order, (-score, user_id))
+
+
+class Leaderboard:
+    """
+    Global and per-topic leaderboards ranked by correct answers.
+
+    Each scope keeps a bisect-managed sorted array, so a user's rank is
+    found in O(log n). Recorded answers are applied right away. Rebuilds
+    read the answer counters that are kept in step with the history
+    (``TelegramUser.total_correct`` and ``UserProgress.questions_correct``),
+    so they cost two bulk reads and no aggregation over the history.
+    Boards are built on first use. Once they are older than
+    ``refresh_interval`` seconds, which brings in answers recorded by other
+    processes, a background thread rebuilds them while readers keep being
+    served the current ones.
+    """
+
+    def __init__(self, refresh_interval=None):
+        self._lock = threading.RLock()
+        self._refresh_interval = refresh_interval
+        self._boards = {}  # GLOBAL or topic_id -> _Board
+        self._loaded_at = None
+        self._refreshing = False
+        self._recorded = []  # answers recorded while a rebuild is running
+
+    @property
+    def refresh_interval(self):
+        return self._refresh_interval or getattr(settings, 'LEADERBOARD_REFRESH_INTERVAL', 60)
+
+    def invalidate(self):
+        """Rebuild the boards on next access."""
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None:
+            self._boards = self._build()
+            self._loaded_at = time.monotonic()
+        elif time.monotonic() - self._loaded_at >= self.refresh_interval and not self._refreshing:
+            self._refreshing = True
+            self._recorded = []
+            threading.Thread(target=self._refresh, name='leaderboard-refresh', daemon=True).start()
+
+    def _refresh(self):
+        try:
+            boards = self._build()
+            with self._lock:
+                if self._loaded_at is not None:
+                    # Not invalidated meanwhile (the next reader rebuilds then).
+                    # Answers recorded during the rebuild may not be in the
+                    # counters yet (buffered writes), so apply them again
+                    for user_id, topic_id in self._recorded:
+                        boards[GLOBAL].add(user_id, 1)
+                        boards.setdefault(topic_id, _Board()).add(user_id, 1)
+                    self._boards = boards
+                    self._loaded_at = time.monotonic()
+        finally:
+            self._refreshing = False
+            connection.close()
+
+    def _build(self):
+        boards = {GLOBAL: _Board()}
+        rows = TelegramUser.objects.filter(total_correct__gt=0).values_list('id', 'total_correct')
+        for user_id, score in rows:
+            boards[GLOBAL].scores[user_id] = score
+        rows = UserProgress.objects.filter(questions_correct__gt=0).values_list(
+            'topic_id', 'user_id', 'questions_correct'
+        )
+        for topic_id, user_id, score in rows:
+            boards.setdefault(topic_id, _Board()).scores[user_id] = score
+        for board in boards.values():
+            board.order = sorted((-score, user_id) for user_id, score in board.scores.items())
+        return boards
+
+    def record(self, user_id, topic_id, is_correct):
+        """Count a recorded answer, if the boards are resident."""
+        if not is_correct:
+            return
+        with self._lock:
+            if self._loaded_at is None:
+                # Will be read from the counters on next access
+                return
+            self._boards[GLOBAL].add(user_id, 1)
+            self._boards.setdefault(topic_id, _Board()).add(user_id, 1)
+            if self._refreshing:
+                self._recorded.append((user_id, topic_id))
+
+    def top(self, limit=10, topic_id=GLOBAL):
+        """The best ``limit`` users of a scope as (rank, user_id, score) tuples."""
+        with self._lock:
+            self._ensure_loaded()
+            board = self._boards.get(topic_id)
+            if board is None:
+                return []
+            top = []
+            for negative_score, user_id in board.order[:limit]:
+                top.append((self._rank(board, -negative_score), user_id, -negative_score))
+            return top
+
+    def _rank(self, board, score):
+        # Users with equal scores share a rank
+        return bisect_left(board.order, (-score,)) + 1
+
+    def rank(self, user_id, topic_id=GLOBAL):
+        """(rank, score, number of ranked users) of a user, or None if unranked."""
+        with self._lock:
+            self._ensure_loaded()
+            board = self._boards.get(topic_id)
+            if board is None or user_id not in board.scores:
+                return None
+            score = board.scores[user_id]
+            return self._rank(board, score), score, len(board.order)
+
+
+leaderboard = Leaderboard()
+
+
+def top_entries(limit=10, topic_id=GLOBAL):
+    """Top of a leaderboard with display names, one query for the users."""
+    top = leaderboard.top(limit, topic_id)
+    users = TelegramUser.objects.in_bulk([user_id for _, user_id, _ in top])
+    entries = []
+    for rank, user_id, score in top:
+        user = users.get(user_id)
+        if user is None:
+            continue
+        entries.append({
+            'rank': rank,
+            'user_id': user.telegram_id,
+            'name': user.first_name or user.username or str(user.telegram_id),
+            'correct_answers': score,
+        })
+    return entries
@@ -0,0 +1,185 @@
+"""Management command computing per-question item analysis from the answer history."""
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.db.models import Case, CharField, Count, F, Q, Value, When
+from django.utils import timezone
+
+from bot.models import QuestionHistory, QuestionStats
+from questions.models import Question
+
+OPTIONS = ['A', 'B', 'C', 'D']
+
+
+class Command(BaseCommand):
+    help = 'Computes p-value, point-biserial discrimination and option pick rates for every answered question'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=50000,
+            help='History rows fetched per chunk (default: 50000)'
+        )
+        parser.add_argument(
+            '--min-answers',
+            type=int,
+            default=30,
+            help='Answers needed before discrimination is computed and a question can be flagged (default: 30)'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        min_answers = options['min_answers']
+
+        users = self._user_totals()
+        sums, picks = self._stream_history(users, chunk_size)
+        if sums is None:
+            self.stdout.write(self.style.WARNING('No answers to analyse.'))
+            return
+
+        stats = self._compute(sums, picks, min_answers)
+        self._save(stats)
+        self.stdout.write(self.style.SUCCESS(f'Analysed {len(stats)} questions'))
+        self._report(stats, min_answers)
+
+    def _user_totals(self):
+        """Answers and correct answers per user, as one GROUP BY in the DB."""
+        rows = (
+            QuestionHistory.objects.order_by()
+            .values('user_id')
+            .annotate(answered=Count('id'), correct=Count('id', filter=Q(is_correct=True)))
+            .values_list('user_id', 'answered', 'correct')
+        )
+        return pd.DataFrame.from_records(
+            list(rows), columns=['user_id', 'answered', 'correct'], index='user_id'
+        )
+
+    def _stream_history(self, users, chunk_size):
+        """
+        Fold the history into per-question sums, one chunk at a time.
+
+        Rows come through ``iterator()``, which uses a server-side cursor
+        on PostgreSQL. Only option letters are fetched from ``user_answer``,
+        never submitted code.
+        """
+        rows = (
+            QuestionHistory.objects.order_by()
+            .annotate(option=Case(
+                When(user_answer__in=OPTIONS, then=F('user_answer')),
+                default=Value(''),
+                output_field=CharField()
+            ))
+            .values_list('user_id', 'question_id', 'is_correct', 'option')
+            .iterator(chunk_size=chunk_size)
+        )
+
+        sums = None
+        picks = None
+        while True:
+            chunk = pd.DataFrame.from_records(
+                list(islice(rows, chunk_size)),
+                columns=['user_id', 'question_id', 'is_correct', 'option']
+            )
+            if chunk.empty:
+                break
+
+            x = chunk['is_correct'].to_numpy(dtype=float)
+            answered = users['answered'].reindex(chunk['user_id']).to_numpy(dtype=float)
+            correct = users['correct'].reindex(chunk['user_id']).to_numpy(dtype=float)
+            # Rest score: the user's accuracy on their other answers
+            ranked = answered > 1
+            y = np.where(ranked, (correct - x) / np.maximum(answered - 1, 1), 0.0)
+            d = ranked.astype(float)
+
+            part = pd.DataFrame({
+                'question_id': chunk['question_id'],
+                'n': 1,
+                'correct': x,
+                'ranked': d,
+                'sx': x * d,
+                'sy': y,
+                'syy': y * y,
+                'sxy': x * y,
+            }).groupby('question_id').sum()
+            sums = part if sums is None else sums.add(part, fill_value=0)
+
+            chosen = chunk[chunk['option'] != '']
+            part = pd.crosstab(chosen['question_id'], chosen['option'])
+            picks = part if picks is None else picks.add(part, fill_value=0)
+
+        return sums, picks
+
+    def _compute(self, sums, picks, min_answers):
+        stats = pd.DataFrame(index=sums.index)
+        stats['answers'] = sums['n'].astype(int)
+        stats['p_value'] = sums['correct'] / sums['n']
+
+        ranked = sums['ranked']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            px = sums['sx'] / ranked
+            my = sums['sy'] / ranked
+            covariance = sums['sxy'] / ranked - px * my
+            variance_y = sums['syy'] / ranked - my * my
+            r = covariance / np.sqrt(px * (1 - px) * variance_y)
+        # Undefined if everyone (or no one) got it right, or too few answers
+        stats['discrimination'] = r.where((ranked >= min_answers) & np.isfinite(r))
+
+        picks = picks.reindex(index=stats.index, columns=OPTIONS, fill_value=0)
+        totals = picks.sum(axis=1)
+        rates = picks.div(totals.where(totals > 0), axis=0).round(4)
+        stats['option_rates'] = [
+            {option: rate for option, rate in row.items() if not np.isnan(rate)}
+            for row in rates.to_dict('records')
+        ]
+        return stats
+
+    def _save(self, stats):
+        now = timezone.now()
+        rows = [
+            QuestionStats(
+                question_id=question_id,
+                answers=row.answers,
+                p_value=row.p_value,
+                discrimination=None if pd.isna(row.discrimination) else row.discrimination,
+                option_rates=row.option_rates,
+                computed_at=now
+            )
+            for question_id, row in zip(stats.index, stats.itertuples(index=False))
+        ]
+        QuestionStats.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['question'],
+            update_fields=['answers', 'p_value', 'discrimination', 'option_rates', 'computed_at']
+        )
+
+    def _report(self, stats, min_answers):
+        """List questions that look broken: too easy/hard, negative discrimination, or a dominant distractor."""
+        correct_options = dict(Question.objects.filter(id__in=stats.index).values_list('id', 'correct_option'))
+        flagged = []
+        for question_id, row in zip(stats.index, stats.itertuples(index=False)):
+            if row.answers < min_answers:
+                continue
+            reasons = []
+            if row.p_value < 0.2:
+                reasons.append(f'hard (p={row.p_value:.2f})')
+            elif row.p_value > 0.95:
+                reasons.append(f'easy (p={row.p_value:.2f})')
+            if not pd.isna(row.discrimination) and row.discrimination < 0.1:
+                reasons.append(f'low discrimination (r={row.discrimination:.2f})')
+            correct_option = correct_options.get(question_id)
+            if row.option_rates and correct_option:
+                top_option = max(row.option_rates, key=row.option_rates.get)
+                if top_option != correct_option:
+                    reasons.append(f'distractor {top_option} picked more than key {correct_option}')
+            if reasons:
+                flagged.append(f'  #{question_id}: ' + '; '.join(reasons))
+
+        if flagged:
+            self.stdout.write(self.style.WARNING(f'{len(flagged)} questions need a look:'))
+            for line in flagged:
+                self.stdout.write(line)
@@ -0,0 +1,50 @@
+"""Management command to recompute the per-user answer counters from history."""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from bot.models import TelegramUser, QuestionHistory
+
+
+class Command(BaseCommand):
+    help = 'Recomputes TelegramUser.total_answered / total_correct from QuestionHistory'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of users recomputed per transaction (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        user_ids = list(TelegramUser.objects.order_by('id').values_list('id', flat=True))
+        fixed = 0
+
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+
+            with transaction.atomic():
+                # Lock the users before counting: an answer commits its history
+                # row and its counter increment together, so none can be lost
+                users = list(TelegramUser.objects.select_for_update().filter(id__in=chunk))
+                counts = {
+                    row['user_id']: (row['answered'], row['correct'])
+                    for row in QuestionHistory.objects.filter(user_id__in=chunk)
+                    .order_by()
+                    .values('user_id')
+                    .annotate(answered=Count('id'), correct=Count('id', filter=Q(is_correct=True)))
+                }
+                changed = []
+                for user in users:
+                    answered, correct = counts.get(user.id, (0, 0))
+                    if (user.total_answered, user.total_correct) != (answered, correct):
+                        user.total_answered, user.total_correct = answered, correct
+                        changed.append(user)
+                TelegramUser.objects.bulk_update(changed, ['total_answered', 'total_correct'])
+            fixed += len(changed)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Checked {len(user_ids)} users, corrected {fixed}')
+        )
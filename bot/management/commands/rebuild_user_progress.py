@@ -0,0 +1,77 @@
+"""Management command to recompute per-topic UserProgress from history."""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from bot.models import TelegramUser, QuestionHistory, UserProgress
+from bot.stats import invalidate_topic_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes UserProgress.questions_attempted / questions_correct from QuestionHistory '
+        '(e.g. for answers recorded through the API before it updated UserProgress)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of users recomputed per transaction (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        user_ids = list(TelegramUser.objects.order_by('id').values_list('id', flat=True))
+        created = fixed = 0
+
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+
+            with transaction.atomic():
+                # Lock the users before counting, as rebuild_answer_counters does
+                list(TelegramUser.objects.select_for_update().filter(id__in=chunk).values_list('id'))
+                counts = {
+                    (row['user_id'], row['question__topic_id']): (row['attempted'], row['correct'])
+                    for row in QuestionHistory.objects.filter(user_id__in=chunk)
+                    .order_by()
+                    .values('user_id', 'question__topic_id')
+                    .annotate(attempted=Count('id'), correct=Count('id', filter=Q(is_correct=True)))
+                }
+                progress = {
+                    (row.user_id, row.topic_id): row
+                    for row in UserProgress.objects.filter(user_id__in=chunk)
+                }
+
+                new = [
+                    UserProgress(
+                        user_id=user_id,
+                        topic_id=topic_id,
+                        questions_attempted=attempted,
+                        questions_correct=correct
+                    )
+                    for (user_id, topic_id), (attempted, correct) in counts.items()
+                    if (user_id, topic_id) not in progress
+                ]
+                changed = []
+                for key, row in progress.items():
+                    attempted, correct = counts.get(key, (0, 0))
+                    if (row.questions_attempted, row.questions_correct) != (attempted, correct):
+                        row.questions_attempted, row.questions_correct = attempted, correct
+                        changed.append(row)
+                UserProgress.objects.bulk_create(new)
+                UserProgress.objects.bulk_update(changed, ['questions_attempted', 'questions_correct'])
+
+                # Only reaches caches shared with this process; others notice the
+                # change with the user's next answer or after TOPIC_STATS_CACHE_TTL
+                user_ids_changed = {row.user_id for row in new + changed}
+                transaction.on_commit(lambda: invalidate_topic_stats(user_ids_changed))
+            created += len(new)
+            fixed += len(changed)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Checked {len(user_ids)} users, created {created} progress rows, corrected {fixed}'
+            )
+        )
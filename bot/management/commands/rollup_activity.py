@@ -0,0 +1,150 @@
+"""Management command maintaining the hourly and daily activity rollups."""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Q
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from bot.models import ActivityRollup, QuestionHistory, RollupWatermark
+
+WATERMARK = 'activity'
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _counts():
+    return {
+        'answers': Count('id'),
+        'correct': Count('id', filter=Q(is_correct=True)),
+        'users': Count('user_id', distinct=True),
+    }
+
+
+def rebuild_day(day):
+    """
+    Recompute all rollup rows of one (local) day from its history.
+
+    A day is always rebuilt as a whole, so distinct user counts stay exact
+    however its answers arrived. Returns the number of rows written.
+    """
+    start = _day_start(day)
+    end = _day_start(day + timedelta(days=1))
+    history = QuestionHistory.objects.filter(answered_at__gte=start, answered_at__lt=end).order_by()
+    hourly = history.annotate(bucket=TruncHour('answered_at'))
+
+    rows = []
+    groups = [
+        ('hour', hourly, ['bucket', 'question__topic_id', 'question__difficulty']),
+        ('hour', hourly, ['bucket']),
+        ('day', history, ['question__topic_id', 'question__difficulty']),
+    ]
+    for period, queryset, group_by in groups:
+        for row in queryset.values(*group_by).annotate(**_counts()):
+            rows.append(ActivityRollup(
+                period=period,
+                bucket=row.get('bucket', start),
+                topic_id=row.get('question__topic_id'),
+                difficulty=row.get('question__difficulty', ''),
+                answers=row['answers'],
+                correct=row['correct'],
+                users=row['users']
+            ))
+    total = history.aggregate(**_counts())
+    if total['answers']:
+        rows.append(ActivityRollup(period='day', bucket=start, **total))
+
+    with transaction.atomic():
+        ActivityRollup.objects.filter(bucket__gte=start, bucket__lt=end).delete()
+        ActivityRollup.objects.bulk_create(rows)
+    return len(rows)
+
+
+def _rebuild_day_in_thread(day):
+    try:
+        return rebuild_day(day)
+    finally:
+        # Each worker thread has its own connection
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Updates the hourly/daily activity rollups with answers recorded since the last run. '
+        'Run it on a schedule (e.g. every few minutes); use --backfill to rebuild past days.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='Rebuild every day in --since..--until instead of only the days with new answers'
+        )
+        parser.add_argument('--since', type=date.fromisoformat, help='First day to backfill (YYYY-MM-DD)')
+        parser.add_argument('--until', type=date.fromisoformat, help='Last day to backfill (YYYY-MM-DD)')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Days rebuilt in parallel during a backfill (default: 4)'
+        )
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            self._backfill(options['since'], options['until'], options['workers'])
+        else:
+            self._update()
+
+    def _update(self):
+        """Rebuild the days touched by answers above the high-water mark."""
+        with transaction.atomic():
+            # The row lock also keeps two scheduled runs from overlapping
+            watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=WATERMARK)
+            new = QuestionHistory.objects.filter(id__gt=watermark.last_history_id).order_by()
+            last_id = new.aggregate(last_id=Max('id'))['last_id']
+            if last_id is None:
+                self.stdout.write('No new answers.')
+                return
+
+            days = sorted(set(
+                new.filter(id__lte=last_id)
+                .annotate(day=TruncDate('answered_at'))
+                .values_list('day', flat=True)
+            ))
+            rows = sum(rebuild_day(day) for day in days)
+            watermark.last_history_id = last_id
+            watermark.save()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {len(days)} day(s), {rows} rollup rows (history up to id {last_id})'
+        ))
+
+    def _backfill(self, since, until, workers):
+        """Rebuild a range of days in parallel."""
+        bounds = QuestionHistory.objects.aggregate(
+            first=Min('answered_at'), last=Max('answered_at'), last_id=Max('id')
+        )
+        if bounds['first'] is None:
+            self.stdout.write('No answers to roll up.')
+            return
+        full = since is None and until is None
+        since = since or timezone.localdate(bounds['first'])
+        until = until or timezone.localdate(bounds['last'])
+        if since > until:
+            raise CommandError('--since must not be after --until')
+
+        days = [since + timedelta(days=offset) for offset in range((until - since).days + 1)]
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            rows = sum(executor.map(_rebuild_day_in_thread, days))
+
+        if full:
+            # Everything up to the snapshot is rolled up; incremental runs continue from there
+            RollupWatermark.objects.get_or_create(name=WATERMARK)
+            RollupWatermark.objects.filter(
+                name=WATERMARK, last_history_id__lt=bounds['last_id']
+            ).update(last_history_id=bounds['last_id'])
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {len(days)} day(s), {rows} rollup rows'))
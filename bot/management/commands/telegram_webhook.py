@@ -0,0 +1,54 @@
+"""Management command to register or remove the Telegram webhook."""
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from telegram import Bot, Update
+
+
+class Command(BaseCommand):
+    help = 'Registers (set), removes (delete) or shows (info) the Telegram webhook'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['set', 'delete', 'info'])
+        parser.add_argument(
+            '--drop-pending',
+            action='store_true',
+            help='Drop updates Telegram has queued for the bot'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.TELEGRAM_BOT_TOKEN:
+            raise CommandError('TELEGRAM_BOT_TOKEN is not set')
+        asyncio.run(self._run(options['action'], options['drop_pending']))
+
+    def _bot(self):
+        if settings.TELEGRAM_API_BASE_URL:
+            return Bot(
+                settings.TELEGRAM_BOT_TOKEN,
+                base_url=f"{settings.TELEGRAM_API_BASE_URL}/bot",
+                base_file_url=f"{settings.TELEGRAM_API_BASE_URL}/file/bot"
+            )
+        return Bot(settings.TELEGRAM_BOT_TOKEN)
+
+    async def _run(self, action, drop_pending):
+        async with self._bot() as bot:
+            if action == 'set':
+                if not settings.TELEGRAM_WEBHOOK_URL or not settings.TELEGRAM_WEBHOOK_SECRET:
+                    raise CommandError('Set TELEGRAM_WEBHOOK_URL and TELEGRAM_WEBHOOK_SECRET first')
+                await bot.set_webhook(
+                    url=settings.TELEGRAM_WEBHOOK_URL,
+                    secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+                    allowed_updates=Update.ALL_TYPES,
+                    drop_pending_updates=drop_pending
+                )
+                self.stdout.write(self.style.SUCCESS(f'Webhook set to {settings.TELEGRAM_WEBHOOK_URL}'))
+            elif action == 'delete':
+                await bot.delete_webhook(drop_pending_updates=drop_pending)
+                self.stdout.write(self.style.SUCCESS('Webhook removed, run_bot.py can poll again'))
+            else:
+                info = await bot.get_webhook_info()
+                self.stdout.write(f'URL: {info.url or "(none, polling)"}')
+                self.stdout.write(f'Pending updates: {info.pending_update_count}')
+                if info.last_error_message:
+                    self.stdout.write(self.style.WARNING(f'Last error: {info.last_error_message}'))
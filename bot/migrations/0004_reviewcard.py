@@ -0,0 +1,67 @@
+# Generated by Django 5.2 on 2026-10-16 22:34
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max, Case, When, Value, IntegerField
+
+
+def create_cards_from_history(apps, schema_editor):
+    """Schedule already answered questions so they don't count as new."""
+    QuestionHistory = apps.get_model('bot', 'QuestionHistory')
+    ReviewCard = apps.get_model('bot', 'ReviewCard')
+
+    answered = QuestionHistory.objects.values('user_id', 'question_id').annotate(
+        last_answered=Max('answered_at'),
+        ever_correct=Max(Case(When(is_correct=True, then=Value(1)), default=Value(0), output_field=IntegerField())),
+    ).order_by()
+
+    batch = []
+    for row in answered.iterator():
+        if row['ever_correct']:
+            interval = datetime.timedelta(days=1)
+            repetitions = 1
+        else:
+            interval = datetime.timedelta(minutes=10)
+            repetitions = 0
+        batch.append(ReviewCard(
+            user_id=row['user_id'],
+            question_id=row['question_id'],
+            due_at=row['last_answered'] + interval,
+            interval=interval,
+            repetitions=repetitions,
+        ))
+        if len(batch) >= 1000:
+            ReviewCard.objects.bulk_create(batch)
+            batch = []
+    ReviewCard.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0003_set_default_topics'),
+        ('questions', '0009_add_datasets_with_through'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewCard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_at', models.DateTimeField(help_text='When the question should be asked again')),
+                ('interval', models.DurationField(default=datetime.timedelta(0), help_text='Current review interval')),
+                ('ease', models.FloatField(default=2.5, help_text='SM-2 ease factor')),
+                ('repetitions', models.PositiveSmallIntegerField(default=0, help_text='Correct answers in a row')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_cards', to='questions.question')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_cards', to='bot.telegramuser')),
+            ],
+            options={
+                'verbose_name': 'Review Card',
+                'verbose_name_plural': 'Review Cards',
+                'indexes': [models.Index(fields=['user', 'due_at'], name='bot_reviewc_user_id_01157d_idx')],
+                'unique_together': {('user', 'question')},
+            },
+        ),
+        migrations.RunPython(create_cards_from_history, migrations.RunPython.noop),
+    ]
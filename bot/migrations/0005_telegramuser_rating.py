@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-16 22:37
+
+from django.db import migrations, models
+
+
+def seed_ratings(apps, schema_editor):
+    """Start user ratings from their chosen difficulty level."""
+    TelegramUser = apps.get_model('bot', 'TelegramUser')
+    for difficulty, rating in [('beginner', 1300), ('advanced', 1700)]:
+        TelegramUser.objects.filter(difficulty_level=difficulty).update(rating=rating)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0004_reviewcard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telegramuser',
+            name='rating',
+            field=models.FloatField(default=1500, help_text='Elo skill rating, updated on every answer'),
+        ),
+        migrations.RunPython(seed_ratings, migrations.RunPython.noop),
+    ]
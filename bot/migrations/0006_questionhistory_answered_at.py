@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-16 22:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0005_telegramuser_rating'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='questionhistory',
+            name='answered_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-16 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0006_questionhistory_answered_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionhistory',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Callback query id / client token; repeated submissions are rejected', max_length=80, null=True, unique=True),
+        ),
+    ]
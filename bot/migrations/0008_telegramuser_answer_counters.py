@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-16 22:42
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_answers(apps, schema_editor):
+    """Fill the counters from the existing history."""
+    TelegramUser = apps.get_model('bot', 'TelegramUser')
+    QuestionHistory = apps.get_model('bot', 'QuestionHistory')
+
+    def history_count(**filters):
+        counts = (
+            QuestionHistory.objects.filter(user=OuterRef('pk'), **filters)
+            .order_by()
+            .values('user')
+            .annotate(n=Count('id'))
+            .values('n')
+        )
+        return Coalesce(Subquery(counts), 0)
+
+    TelegramUser.objects.update(
+        total_answered=history_count(),
+        total_correct=history_count(is_correct=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0007_questionhistory_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telegramuser',
+            name='total_answered',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='telegramuser',
+            name='total_correct',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_answers, migrations.RunPython.noop),
+    ]
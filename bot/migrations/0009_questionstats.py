@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-16 22:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0008_telegramuser_answer_counters'),
+        ('questions', '0010_question_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answers', models.PositiveIntegerField(default=0, help_text='Answers analysed')),
+                ('p_value', models.FloatField(blank=True, help_text='Share of correct answers (difficulty)', null=True)),
+                ('discrimination', models.FloatField(blank=True, help_text="Point-biserial correlation of correctness with the user's score on the other questions", null=True)),
+                ('option_rates', models.JSONField(blank=True, default=dict, help_text='Share of answers picking each option')),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='questions.question')),
+            ],
+            options={
+                'verbose_name': 'Question Stats',
+                'verbose_name_plural': 'Question Stats',
+            },
+        ),
+    ]
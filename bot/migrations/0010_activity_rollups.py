@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-16 22:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0009_questionstats'),
+        ('questions', '0010_question_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField(help_text='Start of the hour or day (local time)')),
+                ('difficulty', models.CharField(blank=True, help_text='Empty for the total over all difficulties', max_length=20)),
+                ('answers', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('users', models.PositiveIntegerField(default=0, help_text='Distinct users who answered')),
+            ],
+            options={
+                'verbose_name': 'Activity Rollup',
+                'verbose_name_plural': 'Activity Rollups',
+                'ordering': ['period', '-bucket'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_history_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='questionhistory',
+            index=models.Index(fields=['answered_at'], name='bot_questio_answere_4a5191_idx'),
+        ),
+        migrations.AddField(
+            model_name='activityrollup',
+            name='topic',
+            field=models.ForeignKey(blank=True, help_text='Empty for the total over all topics', null=True, on_delete=django.db.models.deletion.CASCADE, to='questions.topic'),
+        ),
+        migrations.AddIndex(
+            model_name='activityrollup',
+            index=models.Index(fields=['period', 'bucket'], name='bot_activit_period_c1eb8d_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-16 23:00
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0010_activity_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('user', 'User data'), ('chat', 'Chat data'), ('bot', 'Bot data'), ('conversation', 'Conversation state')], max_length=20)),
+                ('key', models.CharField(help_text='User or chat ID, or conversation name and key', max_length=255)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Bot State',
+                'verbose_name_plural': 'Bot State',
+                'unique_together': {('scope', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-16 23:30
+
+from django.db import migrations, models
+
+
+def align_new_users(apps, schema_editor):
+    """Move beginners who haven't answered yet to the beginner question rating."""
+    TelegramUser = apps.get_model('bot', 'TelegramUser')
+    TelegramUser.objects.filter(
+        difficulty_level='beginner', rating=1500, total_answered=0
+    ).update(rating=1300)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0011_bot_state'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='telegramuser',
+            name='rating',
+            field=models.FloatField(default=1300, help_text='Elo skill rating, updated on every answer'),
+        ),
+        migrations.RunPython(align_new_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-16 23:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0012_telegramuser_rating_default'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='questionhistory',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Answered message / client token; repeated submissions are rejected', max_length=80, null=True, unique=True),
+        ),
+    ]
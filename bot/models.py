@@ -1,4 +1,8 @@
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 
 
 class TelegramUser(models.Model):
@@ -27,6 +31,12 @@ class TelegramUser(models.Model):
         ],
         default='beginner'
     )
+    # Starts at the seeded rating of beginner questions, the default difficulty
+    rating = models.FloatField(default=1300, help_text="Elo skill rating, updated on every answer")
+
+    # Answer counters, kept in step with QuestionHistory (see rebuild_answer_counters)
+    total_answered = models.PositiveIntegerField(default=0)
+    total_correct = models.PositiveIntegerField(default=0)
 
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
@@ -46,12 +56,22 @@ class QuestionHistory(models.Model):
     question = models.ForeignKey('questions.Question', on_delete=models.CASCADE)
     is_correct = models.BooleanField(default=False)
     user_answer = models.TextField(blank=True)
-    answered_at = models.DateTimeField(auto_now_add=True)
+    answered_at = models.DateTimeField(default=timezone.now)
+    idempotency_key = models.CharField(
+        max_length=80,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Answered message / client token; repeated submissions are rejected"
+    )
 
     class Meta:
         verbose_name = 'Question History'
         verbose_name_plural = 'Question History'
         ordering = ['-answered_at']
+        indexes = [
+            models.Index(fields=['answered_at']),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.question} ({'✓' if self.is_correct else '✗'})"
@@ -80,3 +100,143 @@ class UserProgress(models.Model):
         if self.questions_attempted == 0:
             return 0
         return (self.questions_correct / self.questions_attempted) * 100
+
+
+class ReviewCard(models.Model):
+    """Spaced-repetition schedule of a question for a user (SM-2)"""
+    LAPSE_INTERVAL = timedelta(minutes=10)
+    MAX_INTERVAL = timedelta(days=365)
+    MIN_EASE = 1.3
+
+    user = models.ForeignKey(TelegramUser, on_delete=models.CASCADE, related_name='review_cards')
+    question = models.ForeignKey('questions.Question', on_delete=models.CASCADE, related_name='review_cards')
+    due_at = models.DateTimeField(help_text="When the question should be asked again")
+    interval = models.DurationField(default=timedelta(0), help_text="Current review interval")
+    ease = models.FloatField(default=2.5, help_text="SM-2 ease factor")
+    repetitions = models.PositiveSmallIntegerField(default=0, help_text="Correct answers in a row")
+
+    class Meta:
+        verbose_name = 'Review Card'
+        verbose_name_plural = 'Review Cards'
+        unique_together = ('user', 'question')
+        indexes = [
+            models.Index(fields=['user', 'due_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.question} (due {self.due_at:%Y-%m-%d %H:%M})"
+
+    def review(self, is_correct, now=None):
+        """Reschedule the card after an answer (SM-2 with quality 4 / 1)"""
+        now = now or timezone.now()
+        quality = 4 if is_correct else 1
+        self.ease = max(self.MIN_EASE, self.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+        if is_correct:
+            self.repetitions += 1
+            if self.repetitions == 1:
+                self.interval = timedelta(days=1)
+            elif self.repetitions == 2:
+                self.interval = timedelta(days=6)
+            else:
+                self.interval = min(self.interval * self.ease, self.MAX_INTERVAL)
+        else:
+            # Lapsed: ask again soon and start the sequence over
+            self.repetitions = 0
+            self.interval = self.LAPSE_INTERVAL
+
+        self.due_at = now + self.interval
+
+
+class QuestionStats(models.Model):
+    """Item analysis of a question, computed from QuestionHistory by `analyze_questions`"""
+    question = models.OneToOneField('questions.Question', on_delete=models.CASCADE, related_name='stats')
+    answers = models.PositiveIntegerField(default=0, help_text="Answers analysed")
+    p_value = models.FloatField(null=True, blank=True, help_text="Share of correct answers (difficulty)")
+    discrimination = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Point-biserial correlation of correctness with the user's score on the other questions"
+    )
+    option_rates = models.JSONField(default=dict, blank=True, help_text="Share of answers picking each option")
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Question Stats'
+        verbose_name_plural = 'Question Stats'
+
+    def __str__(self):
+        return f"{self.question} (p={self.p_value}, r={self.discrimination})"
+
+
+class ActivityRollup(models.Model):
+    """Answer counts per hour or day and (topic, difficulty), filled by `rollup_activity`"""
+    PERIOD_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField(help_text="Start of the hour or day (local time)")
+    topic = models.ForeignKey(
+        'questions.Topic',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text="Empty for the total over all topics"
+    )
+    difficulty = models.CharField(max_length=20, blank=True, help_text="Empty for the total over all difficulties")
+    answers = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    users = models.PositiveIntegerField(default=0, help_text="Distinct users who answered")
+
+    class Meta:
+        verbose_name = 'Activity Rollup'
+        verbose_name_plural = 'Activity Rollups'
+        ordering = ['period', '-bucket']
+        indexes = [
+            models.Index(fields=['period', 'bucket']),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.bucket:%Y-%m-%d %H:%M} {self.topic or 'all'} {self.difficulty or 'all'}"
+
+    @property
+    def accuracy(self):
+        """Calculate accuracy percentage"""
+        if self.answers == 0:
+            return 0
+        return (self.correct / self.answers) * 100
+
+
+class RollupWatermark(models.Model):
+    """Last QuestionHistory id folded into the activity rollups"""
+    name = models.CharField(max_length=50, unique=True)
+    last_history_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_history_id}"
+
+
+class BotState(models.Model):
+    """Persisted python-telegram-bot data (user_data, chat_data, bot_data, conversations)"""
+    SCOPE_CHOICES = [
+        ('user', 'User data'),
+        ('chat', 'Chat data'),
+        ('bot', 'Bot data'),
+        ('conversation', 'Conversation state'),
+    ]
+
+    scope = models.CharField(max_length=20, choices=SCOPE_CHOICES)
+    key = models.CharField(max_length=255, help_text="User or chat ID, or conversation name and key")
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Bot State'
+        verbose_name_plural = 'Bot State'
+        unique_together = ('scope', 'key')
+
+    def __str__(self):
+        return f"{self.scope} {self.key}"
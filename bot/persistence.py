@@ -0,0 +1,262 @@
+"""python-telegram-bot persistence stored in the project database."""
+import asyncio
+import json
+import logging
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import InterfaceError, OperationalError, connection, transaction
+from django.utils import timezone
+from telegram.ext import BasePersistence, PersistenceInput
+
+from .db_executor import db_sync_to_async
+from .models import BotState
+
+logger = logging.getLogger(__name__)
+
+
+def _dump(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+
+
+class DBPersistence(BasePersistence):
+    """
+    Keeps ``user_data``, ``chat_data``, ``bot_data`` and conversation states
+    in ``BotState`` rows, so they survive a restart of the bot.
+
+    Nothing is loaded up front: a user's (or chat's) data is read on the
+    first update from them, through ``refresh_user_data``. The application
+    hands over changes every ``flush_interval`` seconds (its persistence
+    ``update_interval``); they are compared with what is stored and written
+    in one batch right after that round. ``flush`` (on shutdown) writes
+    what is left. Data is stored as JSON, so tuples come back as lists and
+    dict keys as strings.
+
+    If a batch fails because the DB is unreachable, it is retried with the
+    next round, or after ``flush_interval`` if no round comes. Entries the DB rejects (say, data that isn't JSON
+    serializable) are found by writing the batch entry by entry, logged
+    and dropped, so they can't hold up the others.
+    """
+
+    def __init__(self, flush_interval=None):
+        self._flush_interval = flush_interval
+        super().__init__(
+            store_data=PersistenceInput(callback_data=False),
+            update_interval=self.flush_interval
+        )
+        self._stored = {}  # (scope, key) -> JSON of the stored data, for entries in memory
+        self._loaded = {'user': set(), 'chat': set()}
+        self._pending = {}  # (scope, key) -> data, None to delete
+        self._writing = {}
+        self._write_task = None
+        self._retry_task = None
+
+    @property
+    def flush_interval(self):
+        return self._flush_interval or getattr(settings, 'BOT_PERSISTENCE_INTERVAL', 15)
+
+    # Loading
+
+    def _load(self, scope, key=None):
+        rows = BotState.objects.filter(scope=scope)
+        if key is not None:
+            rows = rows.filter(key=key)
+        return {row.key: row.data for row in rows}
+
+    async def _load_into(self, scope, key, data):
+        key = str(key)
+        if key in self._loaded[scope]:
+            return
+        entry = (scope, key)
+        if entry in self._pending or entry in self._writing:
+            # Spilled and not written yet
+            stored = self._pending[entry] if entry in self._pending else self._writing[entry]
+        else:
+            stored = (await db_sync_to_async(self._load)(scope, key)).get(key)
+            if stored is not None:
+                self._stored[entry] = _dump(stored)
+        self._loaded[scope].add(key)
+        for name, value in (stored or {}).items():
+            data.setdefault(name, value)
+
+    async def get_user_data(self):
+        # Loaded per user on first access, see refresh_user_data
+        return {}
+
+    async def get_chat_data(self):
+        return {}
+
+    async def get_bot_data(self):
+        stored = await db_sync_to_async(self._load)('bot', 'bot')
+        data = stored.get('bot', {})
+        self._stored[('bot', 'bot')] = _dump(data)
+        return data
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name):
+        stored = await db_sync_to_async(self._load)('conversation')
+        conversations = {}
+        for key, state in stored.items():
+            conversation, _, conversation_key = key.partition(':')
+            if conversation == name:
+                conversations[tuple(json.loads(conversation_key))] = state
+                self._stored[('conversation', key)] = _dump(state)
+        return conversations
+
+    async def refresh_user_data(self, user_id, user_data):
+        await self._load_into('user', user_id, user_data)
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        await self._load_into('chat', chat_id, chat_data)
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    # Queueing changes
+
+    def _queue(self, scope, key, data):
+        key = str(key)
+        stored = self._stored.get((scope, key))
+        if stored is None and (data is None or data == {}):
+            # Nothing stored and nothing to store
+            self._pending.pop((scope, key), None)
+            return
+        if stored is not None and data is not None and _dump(data) == stored:
+            self._pending.pop((scope, key), None)
+            return
+        self._pending[(scope, key)] = data
+        self._schedule_write()
+
+    async def update_user_data(self, user_id, data):
+        self._queue('user', user_id, data)
+
+    async def update_chat_data(self, chat_id, data):
+        self._queue('chat', chat_id, data)
+
+    async def update_bot_data(self, data):
+        self._queue('bot', 'bot', data)
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def update_conversation(self, name, key, new_state):
+        self._queue('conversation', f"{name}:{json.dumps(list(key))}", new_state)
+
+    async def drop_user_data(self, user_id):
+        self._loaded['user'].discard(str(user_id))
+        self._queue('user', user_id, None)
+
+    async def drop_chat_data(self, chat_id):
+        self._loaded['chat'].discard(str(chat_id))
+        self._queue('chat', chat_id, None)
+
+    def spill(self, scope, key, data):
+        """
+        Take the data of an entry evicted from memory (see ``BoundedApplication``).
+        It is written with the next batch and loaded again on the next update.
+        """
+        key = str(key)
+        self._queue(scope, key, data)
+        self._loaded[scope].discard(key)
+        self._stored.pop((scope, key), None)
+
+    # Writing
+
+    def _schedule_write(self):
+        """
+        Write pending changes once the current round of updates is handed over.
+
+        The application hands over a round as a batch of coroutines that
+        don't await anything, so a task created by the first of them runs
+        after the others.
+        """
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.get_running_loop().create_task(self._write_pending())
+
+    async def _retry_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._schedule_write()
+
+    def _write(self, changes):
+        now = timezone.now()
+        upserts = [
+            BotState(scope=scope, key=key, data=data, updated_at=now)
+            for (scope, key), data in changes.items() if data is not None
+        ]
+        deletes = [(scope, key) for (scope, key), data in changes.items() if data is None]
+
+        with transaction.atomic():
+            if connection.features.supports_update_conflicts_with_target:
+                BotState.objects.bulk_create(
+                    upserts,
+                    batch_size=500,
+                    update_conflicts=True,
+                    unique_fields=['scope', 'key'],
+                    update_fields=['data', 'updated_at']
+                )
+            else:
+                for row in upserts:
+                    BotState.objects.update_or_create(scope=row.scope, key=row.key, defaults={'data': row.data})
+            for scope, key in deletes:
+                BotState.objects.filter(scope=scope, key=key).delete()
+
+    def _write_each(self, changes):
+        """
+        Write entries one at a time. Returns the entries to retry (the DB
+        connection failed) and those rejected, which are logged and dropped.
+        """
+        failed, rejected = {}, set()
+        for entry, data in changes.items():
+            try:
+                self._write({entry: data})
+            except (OperationalError, InterfaceError):
+                failed[entry] = data
+            except Exception:
+                logger.exception("Dropping bot data %s:%s, it can't be stored: %r", *entry, data)
+                rejected.add(entry)
+        return failed, rejected
+
+    async def _write_pending(self):
+        changes, self._pending = self._pending, {}
+        if not changes:
+            return
+        self._writing = changes
+        failed, rejected = {}, set()
+        try:
+            await db_sync_to_async(self._write)(changes)
+        except (OperationalError, InterfaceError):
+            logger.exception("Failed to persist %d bot data entries, retrying", len(changes))
+            failed = changes
+        except Exception:
+            # Some entry is rejected: find it
+            failed, rejected = await db_sync_to_async(self._write_each)(changes)
+        finally:
+            self._writing = {}
+        queued_meanwhile = bool(self._pending)
+        for entry, data in failed.items():
+            self._pending.setdefault(entry, data)
+        if queued_meanwhile:
+            # Handed over while this batch was being written
+            self._write_task = asyncio.get_running_loop().create_task(self._write_pending())
+        elif failed and (self._retry_task is None or self._retry_task.done()):
+            # Nothing else may be handed over for a while
+            self._retry_task = asyncio.get_running_loop().create_task(self._retry_later())
+
+        for (scope, key), data in changes.items():
+            if (scope, key) in failed or (scope, key) in rejected:
+                continue
+            if data is None or (scope in self._loaded and key not in self._loaded[scope]):
+                # Deleted, or no longer in memory
+                self._stored.pop((scope, key), None)
+            else:
+                self._stored[(scope, key)] = _dump(data)
+
+    async def flush(self):
+        """Write the remaining changes; called by the application on shutdown."""
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+        while self._write_task is not None and not self._write_task.done():
+            await self._write_task
+        await self._write_pending()
@@ -0,0 +1,104 @@
+"""Batched sync of Telegram profile fields (username, names, language)."""
+import asyncio
+import logging
+import threading
+
+from django.conf import settings
+from django.utils import timezone
+
+from .db_executor import db_sync_to_async
+from .models import TelegramUser
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('username', 'first_name', 'last_name', 'language_code')
+
+
+def _truncate(value, field):
+    if value is None:
+        return None
+    return value[:TelegramUser._meta.get_field(field).max_length]
+
+
+def profile_hash(values):
+    return hash(tuple(values))
+
+
+class ProfileSync:
+    """
+    Keeps stored profiles in step with what Telegram sends on every update.
+
+    The incoming fields are hashed and compared with the hash kept on the
+    (cached) user instance. Only users whose profile changed are queued,
+    and the queue is written with ``bulk_update`` every ``flush_interval``
+    seconds. Until started (outside the bot) changes are saved right away.
+    """
+
+    def __init__(self, flush_interval=None):
+        self._flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = {}  # user_id -> TelegramUser
+        self._task = None
+        self.running = False
+
+    @property
+    def flush_interval(self):
+        return self._flush_interval or getattr(settings, 'PROFILE_SYNC_INTERVAL', 30)
+
+    def observe(self, user, telegram_user):
+        """Compare the profile on an update with the stored one; queue the user if it changed."""
+        values = [_truncate(getattr(telegram_user, field), field) for field in FIELDS]
+        incoming = profile_hash(values)
+        stored = getattr(user, '_profile_hash', None)
+        if stored is None:
+            stored = user._profile_hash = profile_hash(getattr(user, field) for field in FIELDS)
+        if incoming == stored:
+            return
+
+        for field, value in zip(FIELDS, values):
+            setattr(user, field, value)
+        user._profile_hash = incoming
+        if not self.running:
+            user.save(update_fields=[*FIELDS, 'updated_at'])
+            return
+        with self._lock:
+            self._pending[user.id] = user
+
+    def _write(self, users):
+        now = timezone.now()
+        for user in users:
+            user.updated_at = now
+        TelegramUser.objects.bulk_update(users, [*FIELDS, 'updated_at'], batch_size=500)
+
+    async def flush(self):
+        """Write all queued profile changes."""
+        with self._lock:
+            users, self._pending = list(self._pending.values()), {}
+        if not users:
+            return
+        try:
+            await db_sync_to_async(self._write)(users)
+        except Exception:
+            logger.exception("Failed to sync %d profiles", len(users))
+            with self._lock:
+                for user in users:
+                    self._pending.setdefault(user.id, user)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self.running = True
+
+    async def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self._task.cancel()
+        await self.flush()
+
+
+profile_sync = ProfileSync()
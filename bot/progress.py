@@ -0,0 +1,75 @@
+"""Atomic UserProgress updates."""
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import UserProgress
+
+# Rows per statement, keeps the parameter count under SQLite's limit
+BATCH_SIZE = 150
+
+
+def _upsert_sql(count):
+    """INSERT ... ON CONFLICT (user, topic) DO UPDATE adding the new values."""
+    meta = UserProgress._meta
+    qn = connection.ops.quote_name
+    table = qn(meta.db_table)
+    columns = [
+        qn(meta.get_field(name).column)
+        for name in ('user', 'topic', 'questions_attempted', 'questions_correct',
+                     'documentation_viewed', 'last_activity')
+    ]
+    user, topic, attempted, correct, viewed, activity = columns
+    values = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * count)
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values} "
+        f"ON CONFLICT ({user}, {topic}) DO UPDATE SET "
+        f"{attempted} = {table}.{attempted} + EXCLUDED.{attempted}, "
+        f"{correct} = {table}.{correct} + EXCLUDED.{correct}, "
+        f"{viewed} = ({table}.{viewed} OR EXCLUDED.{viewed}), "
+        f"{activity} = EXCLUDED.{activity}"
+    )
+
+
+def _fallback(rows, now):
+    """Create missing rows, then increment with F() expressions."""
+    with transaction.atomic():
+        for user_id, topic_id, attempted, correct, viewed in rows:
+            UserProgress.objects.get_or_create(user_id=user_id, topic_id=topic_id)
+            updates = {
+                'questions_attempted': F('questions_attempted') + attempted,
+                'questions_correct': F('questions_correct') + correct,
+                'last_activity': now,
+            }
+            if viewed:
+                updates['documentation_viewed'] = True
+            UserProgress.objects.filter(user_id=user_id, topic_id=topic_id).update(**updates)
+
+
+def upsert_progress(rows):
+    """
+    Add activity to UserProgress rows, creating them as needed.
+
+    ``rows`` are ``(user_id, topic_id, attempted, correct, documentation_viewed)``
+    tuples with unique (user_id, topic_id). On PostgreSQL and SQLite this is
+    a single INSERT ... ON CONFLICT DO UPDATE statement, so concurrent
+    updates never lose increments; other backends fall back to
+    get_or_create plus F() updates.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    now = timezone.now()
+
+    if not connection.features.supports_update_conflicts_with_target:
+        _fallback(rows, now)
+        return
+
+    activity = connection.ops.adapt_datetimefield_value(now)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows[start:start + BATCH_SIZE]
+            params = []
+            for user_id, topic_id, attempted, correct, viewed in batch:
+                params += [user_id, topic_id, attempted, correct, bool(viewed), activity]
+            cursor.execute(_upsert_sql(len(batch)), params)
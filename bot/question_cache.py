@@ -0,0 +1,90 @@
+"""In-process cache of active questions, keyed by ID."""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from questions.models import Question
+from .broadcast import broadcast
+from .question_pool import CHANNEL as QUESTIONS_CHANNEL
+
+
+class QuestionCache:
+    """
+    Active questions (with their topic) by ID, so answer callbacks can be
+    resolved without a DB read.
+
+    Every entry is stamped with the cache version it was loaded under.
+    ``invalidate`` bumps the version, which makes all older entries stale
+    at once; they are reloaded lazily on their next lookup. Edits made by
+    another process arrive through the questions broadcast (see
+    bot/signals.py); the ``ttl`` bounds staleness for anything else, like
+    queryset updates that send no signals.
+    """
+
+    def __init__(self, ttl=None, max_size=None):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # question_id -> (version, expires_at, question)
+        self._version = 0
+
+    @property
+    def ttl(self):
+        return self._ttl or getattr(settings, 'QUESTION_CACHE_TTL', 300)
+
+    @property
+    def max_size(self):
+        return self._max_size or getattr(settings, 'QUESTION_CACHE_SIZE', 5000)
+
+    def invalidate(self):
+        """Mark all cached questions stale, e.g. after a question was edited."""
+        with self._lock:
+            self._version += 1
+
+    def _lookup(self, question_id):
+        """The cached question (or None) and the version a load would be stored under."""
+        broadcast.check(QUESTIONS_CHANNEL)
+        with self._lock:
+            entry = self._entries.get(question_id)
+            if entry is not None and entry[0] == self._version and entry[1] > time.monotonic():
+                self._entries.move_to_end(question_id)
+                return entry[2], self._version
+            return None, self._version
+
+    def _store(self, question, version):
+        with self._lock:
+            # Don't store a question loaded under a version that is already stale
+            if version == self._version:
+                self._entries[question.id] = (version, time.monotonic() + self.ttl, question)
+                self._entries.move_to_end(question.id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+    def _query(self, question_id):
+        return Question.objects.select_related('topic').filter(id=question_id, is_active=True)
+
+    def get(self, question_id):
+        """Return the active question with this ID, or None."""
+        question, version = self._lookup(question_id)
+        if question is not None:
+            return question
+        question = self._query(question_id).first()
+        if question is not None:
+            self._store(question, version)
+        return question
+
+    async def aget(self, question_id):
+        """``get`` with the async ORM."""
+        question, version = self._lookup(question_id)
+        if question is not None:
+            return question
+        question = await self._query(question_id).afirst()
+        if question is not None:
+            self._store(question, version)
+        return question
+
+
+question_cache = QuestionCache()
+broadcast.subscribe(QUESTIONS_CHANNEL, question_cache.invalidate)
@@ -0,0 +1,294 @@
+"""In-memory question pool used for next-question selection."""
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+
+from django.conf import settings
+
+from questions.models import Question
+from .broadcast import broadcast
+from .models import QuestionHistory
+
+# Broadcast channel for question changes (see bot/signals.py)
+CHANNEL = 'questions'
+
+
+def _mix(value):
+    """Cheap 32-bit integer hash (deterministic across processes)."""
+    value = ((value >> 16) ^ value) * 0x45D9F3B & 0xFFFFFFFF
+    value = ((value >> 16) ^ value) * 0x45D9F3B & 0xFFFFFFFF
+    return (value >> 16) ^ value
+
+
+def permute(key, index, domain, rounds=4):
+    """
+    Map ``index`` to its place in a keyed pseudo-random permutation of
+    ``range(domain)``.
+
+    A small balanced Feistel network over the smallest even bit width that
+    covers the domain, cycle-walking until the result falls inside it.
+    """
+    half = max(1, ((domain - 1).bit_length() + 1) // 2)
+    mask = (1 << half) - 1
+    value = index
+    while True:
+        left, right = value >> half, value & mask
+        for round_number in range(rounds):
+            round_key = _mix(key * rounds + round_number)
+            left, right = right, left ^ (_mix(right ^ round_key) & mask)
+        value = (left << half) | right
+        if value < domain:
+            return value
+
+
+class _UserState:
+    """Seen bitset and permutation cursor of one user."""
+    __slots__ = ('seen', 'cursor')
+
+    def __init__(self, seen):
+        self.seen = seen
+        self.cursor = 0
+
+
+class QuestionPool:
+    """
+    Keeps active question IDs grouped by (topic, difficulty, question_type)
+    and a compact per-user bitset of questions the user has already seen.
+    Seen questions come back through their review cards, so the pool only
+    has to supply new ones.
+
+    Every question gets a stable bit position the first time it is loaded,
+    so a group is just an int bitmask and "new questions of a group"
+    is ``group_mask & ~seen_mask`` - no ORM objects are built for the
+    candidates. Positions are never reused, which keeps the user bitsets
+    valid across pool reloads.
+
+    Questions are handed out in a per-user pseudo-random order: a keyed
+    permutation of the bit positions is walked from the user's cursor, so
+    no candidate list is built, the order is reproducible, and the same
+    question is not served twice in a row once everything has been seen.
+
+    Question ratings are kept in a sorted (rating, position) index, so new
+    questions can be restricted to a band around the user's rating.
+
+    The lock only guards the in-memory structures: question reloads and
+    users' history are read from the DB without holding it, and installed
+    under it.
+    """
+
+    def __init__(self, max_users=None):
+        self._lock = threading.RLock()
+        self._max_users = max_users
+        self._loaded = False
+        self._version = 0  # bumped by invalidate, to spot reloads that read stale rows
+        self._positions = {}  # question_id -> bit position
+        self._ids = []  # bit position -> question_id
+        self._groups = {}  # (topic_id, difficulty, question_type) -> mask
+        self._ratings = {}  # position -> rating
+        self._by_rating = []  # sorted (rating, position)
+        self._users = OrderedDict()  # user_id -> _UserState, in LRU order
+        self._loading = {}  # user_id -> seen bits marked while their history is read
+
+    @property
+    def rating_band(self):
+        return getattr(settings, 'RATING_BAND', 100)
+
+    @property
+    def max_users(self):
+        if self._max_users is None:
+            return getattr(settings, 'QUESTION_POOL_MAX_USERS', 20000)
+        return self._max_users
+
+    def invalidate(self):
+        """Reload active questions on next access (called on Question changes)."""
+        with self._lock:
+            self._loaded = False
+            self._version += 1
+
+    def _position(self, question_id):
+        position = self._positions.get(question_id)
+        if position is None:
+            position = len(self._ids)
+            self._positions[question_id] = position
+            self._ids.append(question_id)
+        return position
+
+    def _ensure_loaded(self):
+        """Load active questions if needed; call without holding the lock."""
+        with self._lock:
+            if self._loaded:
+                return
+            version = self._version
+        rows = list(Question.objects.filter(is_active=True).order_by('rating').values_list(
+            'id', 'topic_id', 'difficulty', 'question_type', 'rating'
+        ))
+        with self._lock:
+            if self._loaded:
+                # Loaded by another thread meanwhile
+                return
+            groups = {}
+            ratings = {}
+            by_rating = []
+            for question_id, topic_id, difficulty, question_type, rating in rows:
+                position = self._position(question_id)
+                key = (topic_id, difficulty, question_type)
+                groups[key] = groups.get(key, 0) | (1 << position)
+                ratings[position] = rating
+                by_rating.append((rating, position))
+            self._groups = groups
+            self._ratings = ratings
+            self._by_rating = by_rating
+            # Invalidated while reading: use these rows, but reload next time
+            self._loaded = version == self._version
+
+    def _user_state(self, user_id):
+        """The user's state, read from their history if needed; call without holding the lock."""
+        with self._lock:
+            state = self._users.get(user_id)
+            if state is not None:
+                self._users.move_to_end(user_id)
+                return state
+            self._loading.setdefault(user_id, 0)
+
+        try:
+            seen_ids = list(QuestionHistory.objects.filter(
+                user_id=user_id
+            ).values_list('question_id', flat=True).distinct())
+        except Exception:
+            with self._lock:
+                self._loading.pop(user_id, None)
+            raise
+
+        with self._lock:
+            marked = self._loading.pop(user_id, 0)
+            state = self._users.get(user_id)
+            if state is not None:
+                # Loaded by another thread meanwhile
+                state.seen |= marked
+                return state
+            mask = marked
+            for question_id in seen_ids:
+                position = self._positions.get(question_id)
+                if position is not None:
+                    mask |= 1 << position
+            state = self._users[user_id] = _UserState(mask)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+            return state
+
+    def _group_mask(self, topic_id, difficulty, question_type):
+        mask = 0
+        for (g_topic, g_difficulty, g_type), group in self._groups.items():
+            if topic_id is not None and g_topic != topic_id:
+                continue
+            if difficulty and g_difficulty != difficulty:
+                continue
+            if question_type and g_type != question_type:
+                continue
+            mask |= group
+        return mask
+
+    def _rating_mask(self, rating, band):
+        low = bisect_left(self._by_rating, (rating - band, -1))
+        high = bisect_right(self._by_rating, (rating + band, len(self._ids)))
+        mask = 0
+        for _, position in self._by_rating[low:high]:
+            mask |= 1 << position
+        return mask
+
+    def _near_rating(self, candidates, rating, k):
+        """Narrow candidates to the tightest rating band holding ``k`` of them."""
+        band = self.rating_band
+        while band < 3200:
+            near = candidates & self._rating_mask(rating, band)
+            if near.bit_count() >= k:
+                return near
+            band *= 2
+        return candidates
+
+    def _walk(self, user_id, state, candidates, k):
+        """Take the next ``k`` candidates from the user's permutation."""
+        domain = len(self._ids)
+        wanted = min(k, candidates.bit_count())
+        picked = []
+        index = state.cursor
+        while len(picked) < wanted:
+            position = permute(user_id, index % domain, domain)
+            index += 1
+            if candidates >> position & 1:
+                picked.append(self._ids[position])
+        state.cursor = index % domain
+        return picked
+
+    def sample(self, user_id, k, topic_id=None, difficulty=None, question_type=None,
+               exclude=(), rating=None):
+        """
+        Return the IDs of the next ``k`` questions the user hasn't seen yet.
+
+        With ``rating``, questions rated closest to it are preferred.
+        Questions in ``exclude`` are skipped. Falls back to already seen
+        questions of the group only when the user has seen all of it;
+        when the unseen ones are all excluded, fewer (or no) IDs are
+        returned.
+        """
+        # Questions may have been changed by another process (admin, API)
+        broadcast.check(CHANNEL)
+        self._ensure_loaded()
+        with self._lock:
+            group = self._group_mask(topic_id, difficulty, question_type)
+            excluded = 0
+            for question_id in exclude:
+                position = self._positions.get(question_id)
+                if position is not None:
+                    excluded |= 1 << position
+            if not group & ~excluded:
+                return []
+        state = self._user_state(user_id)
+        with self._lock:
+            if not group & ~state.seen:
+                return self._walk(user_id, state, group & ~excluded, k)
+            candidates = group & ~state.seen & ~excluded
+            if not candidates:
+                return []
+            if rating is not None:
+                candidates = self._near_rating(candidates, rating, k)
+            return self._walk(user_id, state, candidates, k)
+
+    def pick(self, user_id, topic_id=None, difficulty=None, question_type=None):
+        """
+        Return the ID of the next question the user hasn't seen yet.
+
+        Falls back to any question of the group when everything was seen,
+        and returns None when the group is empty.
+        """
+        question_ids = self.sample(user_id, 1, topic_id, difficulty, question_type)
+        return question_ids[0] if question_ids else None
+
+    def mark_seen(self, user_id, question_id):
+        """Set the seen bit for a question, if the user's bitset is resident."""
+        with self._lock:
+            state = self._users.get(user_id)
+            if state is None:
+                if user_id in self._loading:
+                    # History being read, the answer may not be in it
+                    self._loading[user_id] |= 1 << self._position(question_id)
+                # Otherwise loaded from QuestionHistory on next access
+                return
+            state.seen |= 1 << self._position(question_id)
+
+    def adjust_rating(self, question_id, delta):
+        """Move a question in the rating index after an answer."""
+        with self._lock:
+            position = self._positions.get(question_id)
+            rating = self._ratings.get(position)
+            if rating is None:
+                return
+            index = bisect_left(self._by_rating, (rating, position))
+            if index < len(self._by_rating) and self._by_rating[index] == (rating, position):
+                del self._by_rating[index]
+            self._ratings[position] = rating + delta
+            insort(self._by_rating, (rating + delta, position))
+
+
+question_pool = QuestionPool()
+broadcast.subscribe(CHANNEL, question_pool.invalidate)
@@ -0,0 +1,122 @@
+"""Per-user queues of prefetched question IDs."""
+import asyncio
+import logging
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+from .db_executor import db_sync_to_async
+from .broadcast import broadcast
+from .question_pool import CHANNEL as QUESTIONS_CHANNEL, question_pool
+
+logger = logging.getLogger(__name__)
+
+# Queued IDs tried before giving up when they no longer resolve to a question
+STALE_QUESTION_RETRIES = 3
+
+
+class QuestionQueue:
+    """
+    Holds the next few question IDs for every active user.
+
+    A queue is tied to the (topic, difficulty) it was filled for; asking
+    with different preferences starts a new one. Serving pops from a deque,
+    and once a queue drops to the low-water mark it is topped up by a
+    background task, so the pool lookup stays off the request path.
+    """
+
+    def __init__(self, size=None, low_water=None, max_users=None):
+        self._size = size
+        self._low_water = low_water
+        self._max_users = max_users
+        self._queues = OrderedDict()  # user_id -> (key, deque of question IDs)
+        self._refilling = set()
+        self._tasks = set()
+
+    @property
+    def size(self):
+        return self._size or getattr(settings, 'QUESTION_QUEUE_SIZE', 10)
+
+    @property
+    def low_water(self):
+        return self._low_water or getattr(settings, 'QUESTION_QUEUE_LOW_WATER', 3)
+
+    @property
+    def max_users(self):
+        return self._max_users or getattr(settings, 'QUESTION_QUEUE_MAX_USERS', 20000)
+
+    def invalidate(self, user_id):
+        """Drop a user's queue, e.g. after a topic or difficulty change."""
+        self._queues.pop(user_id, None)
+
+    def clear(self):
+        """Drop all queues, e.g. after the question set changed."""
+        self._queues.clear()
+
+    async def _refill(self, user_id, key, rating=None):
+        entry = self._queues.get(user_id)
+        if entry is None or entry[0] != key:
+            return
+        topic_id, difficulty = key
+        queued = entry[1]
+        question_ids = await db_sync_to_async(question_pool.sample)(
+            user_id,
+            self.size - len(queued),
+            topic_id=topic_id,
+            difficulty=difficulty,
+            exclude=tuple(queued),
+            rating=rating
+        )
+        # Preferences may have changed while we were sampling
+        current = self._queues.get(user_id)
+        if current is not None and current[0] == key:
+            current[1].extend(question_ids)
+
+    async def _background_refill(self, user_id, key, rating):
+        try:
+            await self._refill(user_id, key, rating)
+        except Exception:
+            logger.exception("Failed to refill question queue for user %s", user_id)
+        finally:
+            self._refilling.discard(user_id)
+
+    def _schedule_refill(self, user_id, key, rating):
+        if user_id in self._refilling:
+            return
+        self._refilling.add(user_id)
+        task = asyncio.get_running_loop().create_task(self._background_refill(user_id, key, rating))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def next_question_id(self, user_id, topic_id=None, difficulty=None, rating=None):
+        """
+        Pop the next question ID for the user, or None if there are no questions.
+        Refills prefer questions rated close to ``rating``.
+        """
+        # Queued IDs are dropped when questions changed in another process
+        broadcast.check(QUESTIONS_CHANNEL)
+        key = (topic_id, difficulty)
+        entry = self._queues.get(user_id)
+        if entry is None or entry[0] != key:
+            entry = (key, deque())
+            self._queues[user_id] = entry
+            while len(self._queues) > self.max_users:
+                self._queues.popitem(last=False)
+        else:
+            self._queues.move_to_end(user_id)
+
+        queued = entry[1]
+        if not queued:
+            # Cold queue: fill it on the request path
+            await self._refill(user_id, key, rating)
+        if not queued:
+            return None
+
+        question_id = queued.popleft()
+        if len(queued) <= self.low_water:
+            self._schedule_refill(user_id, key, rating)
+        return question_id
+
+
+question_queue = QuestionQueue()
+broadcast.subscribe(QUESTIONS_CHANNEL, question_queue.clear)
@@ -0,0 +1,21 @@
+"""Elo-style ratings for users and questions."""
+from django.conf import settings
+
+
+def expected_score(user_rating, question_rating):
+    """Probability that the user answers the question correctly."""
+    return 1 / (1 + 10 ** ((question_rating - user_rating) / 400))
+
+
+def rating_changes(user_rating, question_rating, is_correct):
+    """
+    Return (user_delta, question_delta) for one answer.
+
+    The user gains what the question loses, scaled by separate K factors:
+    questions collect far more answers, so they move more slowly.
+    """
+    surprise = (1 if is_correct else 0) - expected_score(user_rating, question_rating)
+    return (
+        getattr(settings, 'RATING_K_USER', 32) * surprise,
+        -getattr(settings, 'RATING_K_QUESTION', 16) * surprise,
+    )
@@ -0,0 +1,66 @@
+"""Next-question selection shared by the bot and the Mini App API."""
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import ReviewCard, UserProgress
+from .question_pool import question_pool
+
+
+def due_cards(user_id, topic_id=None, difficulty=None, question_type=None):
+    """Review cards of a user that are due now, most overdue first."""
+    cards = ReviewCard.objects.filter(
+        user_id=user_id,
+        due_at__lte=timezone.now(),
+        question__is_active=True
+    )
+    if topic_id:
+        cards = cards.filter(question__topic_id=topic_id)
+    if difficulty:
+        cards = cards.filter(question__difficulty=difficulty)
+    if question_type:
+        cards = cards.filter(question__question_type=question_type)
+    return cards.order_by('due_at')
+
+
+def next_question_ids(user_id, count, topic_id=None, difficulty=None, question_type=None, rating=None):
+    """
+    IDs of the next ``count`` questions for a user.
+
+    Due reviews come first, the rest is filled with new questions from the
+    pool, preferring those rated close to the user's ``rating``.
+    """
+    question_ids = list(
+        due_cards(user_id, topic_id, difficulty, question_type).values_list('question_id', flat=True)[:count]
+    )
+    if len(question_ids) < count:
+        question_ids += question_pool.sample(
+            user_id,
+            count - len(question_ids),
+            topic_id=topic_id,
+            difficulty=difficulty,
+            question_type=question_type,
+            exclude=question_ids,
+            rating=rating
+        )
+    return question_ids
+
+
+def question_context_annotations():
+    """
+    TelegramUser annotations for loading ``/next`` in one query: whether
+    the documentation of the current topic was viewed, and the most
+    overdue review question for the current topic and difficulty.
+    """
+    viewed = UserProgress.objects.filter(
+        user=OuterRef('pk'),
+        topic=OuterRef('current_topic')
+    ).values('documentation_viewed')[:1]
+    due = due_cards(
+        OuterRef('pk'),
+        topic_id=OuterRef('current_topic'),
+        difficulty=OuterRef('difficulty_level')
+    ).values('question_id')[:1]
+    return {
+        'topic_documentation_viewed': Subquery(viewed),
+        'due_question_id': Subquery(due),
+    }
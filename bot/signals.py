@@ -0,0 +1,31 @@
+"""Signal handlers keeping the bot's in-memory caches in sync with the DB."""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from questions.models import Question, Topic
+from .broadcast import broadcast
+from .question_cache import question_cache
+from .question_pool import CHANNEL as QUESTIONS_CHANNEL, question_pool
+from .question_queue import question_queue
+from .topic_cache import CHANNEL as TOPICS_CHANNEL, topic_cache
+from .user_cache import user_cache
+
+# Cached users hold their current topic
+broadcast.subscribe(TOPICS_CHANNEL, user_cache.clear)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_question_pool(sender, **kwargs):
+    """Reload the question pool here and, once committed, in every other process."""
+    question_pool.invalidate()
+    question_queue.clear()
+    question_cache.invalidate()
+    broadcast.publish(QUESTIONS_CHANNEL)
+
+
+@receiver([post_save, post_delete], sender=Topic)
+def invalidate_topic_cache(sender, **kwargs):
+    """Drop cached topics here and, once committed, in every other process."""
+    topic_cache.invalidate()
+    user_cache.clear()
+    broadcast.publish(TOPICS_CHANNEL)
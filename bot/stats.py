@@ -0,0 +1,64 @@
+"""Per-user statistics shared by the bot and the Mini App API."""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import UserProgress
+
+
+def _key(user_id):
+    return f"topic-stats:{user_id}"
+
+
+def invalidate_topic_stats(user_ids):
+    """Drop cached stats once new answers of these users are committed."""
+    cache.delete_many([_key(user_id) for user_id in user_ids])
+
+
+def _progress(user):
+    return (
+        UserProgress.objects.filter(user=user)
+        .select_related('topic')
+        .order_by('topic__order', 'topic_id')
+    )
+
+
+def _row(progress):
+    return {
+        'topic': progress.topic.name,
+        'attempted': progress.questions_attempted,
+        'correct': progress.questions_correct,
+        'accuracy': progress.accuracy,
+    }
+
+
+def topic_stats(user):
+    """
+    Per-topic breakdown of a user's answers, read from UserProgress.
+
+    Cached per user together with ``user.total_answered``. An entry is
+    dropped when answers are written and is ignored once the user's counter
+    has moved past it. The project configures no ``CACHES``, so this is
+    Django's default LocMemCache, private to each process: the drop only
+    reaches the writing process, and the counter check covers answers
+    written by the others.
+    """
+    key = _key(user.id)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == user.total_answered:
+        return cached[1]
+
+    stats = [_row(progress) for progress in _progress(user)]
+    cache.set(key, (user.total_answered, stats), getattr(settings, 'TOPIC_STATS_CACHE_TTL', 3600))
+    return stats
+
+
+async def atopic_stats(user):
+    """``topic_stats`` with the async ORM and cache API."""
+    key = _key(user.id)
+    cached = await cache.aget(key)
+    if cached is not None and cached[0] == user.total_answered:
+        return cached[1]
+
+    stats = [_row(progress) async for progress in _progress(user)]
+    await cache.aset(key, (user.total_answered, stats), getattr(settings, 'TOPIC_STATS_CACHE_TTL', 3600))
+    return stats
@@ -0,0 +1,119 @@
+"""Answer buffer tests."""
+import glob
+import json
+
+import pytest
+from django.db import OperationalError
+from django.utils import timezone
+
+from questions.models import Topic, Question
+from bot import answer_buffer as answer_buffer_module
+from bot.answer_buffer import AnswerBuffer
+from bot.answers import AnswerEvent
+from bot.models import TelegramUser, QuestionHistory
+
+# The buffer writes from the DB thread pool, outside the test's transaction
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def user():
+    return TelegramUser.objects.create(telegram_id=1000)
+
+
+@pytest.fixture
+def questions():
+    topic = Topic.objects.create(name="Buffer topic", order=100)
+    return [
+        Question.objects.create(topic=topic, question_text=f"Q{i}", correct_option='A', explanation="")
+        for i in range(4)
+    ]
+
+
+@pytest.fixture
+def buffer(tmp_path):
+    return AnswerBuffer(log_path=tmp_path / 'answers.log', max_events=100, flush_interval=3600)
+
+
+def make_event(user, question, is_correct=True):
+    return AnswerEvent(
+        user_id=user.id,
+        question_id=question.id,
+        topic_id=question.topic_id,
+        user_answer='A',
+        is_correct=is_correct,
+        answered_at=timezone.now(),
+        user_delta=0,
+        question_delta=0,
+    )
+
+
+def rotated_logs(buffer):
+    return glob.glob(f"{buffer.log_path}.*")
+
+
+async def test_start_replays_leftover_log(buffer, user, questions):
+    events = [make_event(user, question) for question in questions]
+    # A live log and a rotated one, as left by a crash during a flush
+    with open(f"{buffer.log_path}.1", 'w', encoding='utf-8') as log:
+        log.write(answer_buffer_module._encode(events[0]) + '\n')
+    with open(buffer.log_path, 'w', encoding='utf-8') as log:
+        log.writelines(answer_buffer_module._encode(event) + '\n' for event in events[1:])
+        log.write('{"user_id": ')  # cut short mid-write
+
+    await buffer.start()
+    try:
+        assert await QuestionHistory.objects.filter(user=user).acount() == len(events)
+        assert (await TelegramUser.objects.aget(pk=user.pk)).total_answered == len(events)
+        assert rotated_logs(buffer) == []
+    finally:
+        await buffer.stop()
+
+
+async def test_rejected_event_goes_to_dead_letter_log(buffer, user, questions):
+    events = [make_event(user, question) for question in questions]
+    # Answer to a question deleted in the meantime
+    missing = events[2]._replace(question_id=questions[-1].id + 1000)
+    events[2] = missing
+
+    await buffer.start()
+    try:
+        for event in events:
+            buffer.submit(event)
+        await buffer.flush()
+
+        stored = [question_id async for question_id in QuestionHistory.objects.values_list('question_id', flat=True)]
+        assert sorted(stored) == sorted(event.question_id for event in events if event is not missing)
+        with open(buffer.dead_letter_path, encoding='utf-8') as log:
+            assert [json.loads(line)['question_id'] for line in log] == [missing.question_id]
+        assert rotated_logs(buffer) == []
+    finally:
+        await buffer.stop()
+
+
+async def test_connection_failure_keeps_batch_and_log(buffer, user, questions, monkeypatch):
+    events = [make_event(user, question) for question in questions[:2]]
+
+    def unreachable(events):
+        raise OperationalError("connection refused")
+
+    await buffer.start()
+    try:
+        monkeypatch.setattr(answer_buffer_module, 'persist_answers', unreachable)
+        for event in events:
+            buffer.submit(event)
+        await buffer.flush()
+
+        assert buffer._pending == events
+        [rotated] = rotated_logs(buffer)
+        with open(rotated, encoding='utf-8') as log:
+            assert [answer_buffer_module._decode(line) for line in log] == events
+        assert await QuestionHistory.objects.acount() == 0
+
+        # The next flush writes the kept batch and drops its log
+        monkeypatch.undo()
+        await buffer.flush()
+        assert await QuestionHistory.objects.acount() == len(events)
+        assert rotated_logs(buffer) == []
+    finally:
+        await buffer.stop()
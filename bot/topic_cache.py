@@ -0,0 +1,55 @@
+"""Process-level cache of the ordered topic list."""
+import threading
+
+from questions.models import Topic
+from .broadcast import broadcast
+
+CHANNEL = 'topics'
+
+
+class TopicCache:
+    """
+    All topics in display order, loaded once per change.
+
+    Topic saves and deletes invalidate it in this process directly and in
+    all others through ``broadcast``. A version counter keeps a list loaded
+    while an invalidation came in from being stored.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._topics = None
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._topics = None
+
+    def all(self):
+        """All topics ordered like ``Topic.get_default``."""
+        broadcast.check(CHANNEL)
+        with self._lock:
+            topics, version = self._topics, self._version
+        if topics is None:
+            topics = list(Topic.objects.order_by('order', 'name'))
+            with self._lock:
+                if version == self._version:
+                    self._topics = topics
+        return list(topics)
+
+    def default(self):
+        """The default topic (first by order), or None if there are no topics."""
+        topics = self.all()
+        return topics[0] if topics else None
+
+    def get(self, topic_id=None, name=None):
+        """A topic by id or name, or None."""
+        for topic in self.all():
+            if topic.id == topic_id or (name is not None and topic.name == name):
+                return topic
+        return None
+
+
+topic_cache = TopicCache()
+broadcast.subscribe(CHANNEL, topic_cache.invalidate)
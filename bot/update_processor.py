@@ -0,0 +1,163 @@
+"""Concurrent update processing with per-user ordering."""
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from .db_executor import db_executor
+
+logger = logging.getLogger(__name__)
+
+
+def _chat_id(update):
+    if isinstance(update, Update) and update.effective_chat:
+        return update.effective_chat.id
+    return None
+
+
+def _user_key(update):
+    if not isinstance(update, Update):
+        return None
+    if update.effective_user:
+        return update.effective_user.id
+    if update.effective_chat:
+        return update.effective_chat.id
+    return None
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Runs up to ``max_concurrent_updates`` updates at once, one at a time per user.
+
+    Updates of different users run in parallel. Each user has an
+    ``asyncio.Lock``, taken before a concurrency slot, so a user's queued
+    updates wait without holding slots and one busy user can't starve the
+    others. The base class wraps ``do_process_update`` in its own
+    semaphore, so it gets a limit that is never reached and the slots are
+    a second semaphore taken after the user's lock. The locks are FIFO,
+    like the semaphore, so one user's updates run strictly in arrival
+    order (answer -> next can't race). A lock exists only while that user
+    has updates in flight. ``in_flight`` tells whether a user or chat has
+    updates queued or running, so their data isn't evicted from memory
+    under them.
+
+    ``metrics()`` reports the update queue depth, updates in flight and
+    waiting for their user, and lock wait times. The numbers are also
+    logged every ``BOT_METRICS_INTERVAL`` seconds, along with the DB pool
+    and the resident user_data/chat_data.
+    """
+
+    # Limit for the base class semaphore, see above
+    UNBOUNDED = 2 ** 31 - 1
+
+    def __init__(self, max_concurrent_updates, application=None):
+        if max_concurrent_updates < 1:
+            raise ValueError("`max_concurrent_updates` must be a positive integer!")
+        super().__init__(self.UNBOUNDED)
+        self.application = application
+        self.concurrency = max_concurrent_updates
+        self._slots = asyncio.Semaphore(max_concurrent_updates)
+        self._running = 0
+        self._locks = {}  # user key -> [lock, updates holding or waiting]
+        self._chats = {}  # chat id -> updates holding or waiting
+        self._waiting = 0
+        self._reporter = None
+        self._reset_waits()
+
+    def _reset_waits(self):
+        self._wait_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _record_wait(self, seconds):
+        self._wait_count += 1
+        self._wait_total += seconds
+        self._wait_max = max(self._wait_max, seconds)
+
+    async def do_process_update(self, update, coroutine):
+        chat_id = _chat_id(update)
+        if chat_id is not None:
+            self._chats[chat_id] = self._chats.get(chat_id, 0) + 1
+        try:
+            await self._process_in_order(update, coroutine)
+        finally:
+            if chat_id is not None:
+                self._chats[chat_id] -= 1
+                if not self._chats[chat_id]:
+                    del self._chats[chat_id]
+
+    async def _run(self, coroutine):
+        async with self._slots:
+            self._running += 1
+            try:
+                await coroutine
+            finally:
+                self._running -= 1
+
+    async def _process_in_order(self, update, coroutine):
+        key = _user_key(update)
+        if key is None:
+            await self._run(coroutine)
+            return
+
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        self._waiting += 1
+        waiting = True
+        started = time.monotonic()
+        try:
+            async with entry[0]:
+                self._waiting -= 1
+                waiting = False
+                self._record_wait(time.monotonic() - started)
+                await self._run(coroutine)
+        finally:
+            if waiting:
+                self._waiting -= 1
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    def in_flight(self, user_id=None, chat_id=None):
+        """Whether the user (or chat) has updates queued or running."""
+        if user_id is not None:
+            return user_id in self._locks
+        return chat_id in self._chats
+
+    def metrics(self, reset=False):
+        """Current load and lock waits (since the last reset)."""
+        metrics = {
+            'queued': self.application.update_queue.qsize() if self.application is not None else None,
+            'in_flight': self._running,
+            'max_concurrent': self.concurrency,
+            'waiting_for_user': self._waiting,
+            'lock_waits': self._wait_count,
+            'lock_wait_avg_ms': round(self._wait_total / self._wait_count * 1000, 1) if self._wait_count else 0.0,
+            'lock_wait_max_ms': round(self._wait_max * 1000, 1),
+        }
+        if reset:
+            self._reset_waits()
+        return metrics
+
+    async def _report(self):
+        interval = getattr(settings, 'BOT_METRICS_INTERVAL', 60)
+        while True:
+            await asyncio.sleep(interval)
+            logger.info("Update processing: %s", self.metrics(reset=True))
+            logger.info("Bot DB pool: %s", db_executor.metrics(reset=True))
+            if hasattr(self.application, 'data_metrics'):
+                logger.info("Bot data: %s", self.application.data_metrics())
+
+    async def initialize(self):
+        if getattr(settings, 'BOT_METRICS_INTERVAL', 60) > 0:
+            self._reporter = asyncio.get_running_loop().create_task(self._report())
+
+    async def shutdown(self):
+        if self._reporter is not None:
+            self._reporter.cancel()
+            self._reporter = None
@@ -2,6 +2,6 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
-    # Add webhook endpoint if needed in future
-    # path('webhook/', views.webhook, name='webhook'),
+    # Telegram updates in webhook mode (TELEGRAM_WEBHOOK_ENABLED)
+    path('webhook/', views.webhook, name='webhook'),
 ]
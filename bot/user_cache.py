@@ -0,0 +1,74 @@
+"""In-process cache of TelegramUser rows, keyed by Telegram ID."""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class UserCache:
+    """
+    Recently seen users (with ``current_topic`` loaded), so identifying the
+    sender of an update needs no query.
+
+    Bounded LRU with a TTL. Answers recorded through the bot update the
+    cached instance in place (rating, counters). Topic and difficulty
+    changes drop the entry. Edits made by other processes (admin, API)
+    show up once the entry expires.
+    """
+
+    def __init__(self, ttl=None, max_size=None):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # telegram_id -> (expires_at, user)
+
+    @property
+    def ttl(self):
+        return self._ttl or getattr(settings, 'USER_CACHE_TTL', 300)
+
+    @property
+    def max_size(self):
+        return self._max_size or getattr(settings, 'USER_CACHE_SIZE', 10000)
+
+    def get(self, telegram_id):
+        """Return the cached user, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(telegram_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[telegram_id]
+                return None
+            self._entries.move_to_end(telegram_id)
+            return entry[1]
+
+    def put(self, user):
+        """
+        Cache a user loaded from the DB. Putting back the cached instance
+        (on a hit) keeps its expiry, so even a user active all the time is
+        reloaded every ``ttl`` seconds.
+        """
+        with self._lock:
+            entry = self._entries.get(user.telegram_id)
+            if entry is not None and entry[1] is user:
+                expires_at = entry[0]
+            else:
+                expires_at = time.monotonic() + self.ttl
+            self._entries[user.telegram_id] = (expires_at, user)
+            self._entries.move_to_end(user.telegram_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all users, e.g. after topics changed (users hold their current topic)."""
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, telegram_id):
+        """Drop a user, e.g. after their preferences changed."""
+        with self._lock:
+            self._entries.pop(telegram_id, None)
+
+
+user_cache = UserCache()
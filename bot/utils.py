@@ -1,18 +1,26 @@
 """Utility functions for the bot."""
-import random
-from asgiref.sync import sync_to_async
-from django.db.models import Q, Count
-from .models import TelegramUser, QuestionHistory, UserProgress
-from questions.models import Question, Topic
+from django.conf import settings
 
+from .answer_buffer import answer_buffer
+from .answers import apply_answer_event, claim_answer_key, make_answer_event, save_answer
+from .broadcast import broadcast
+from .db_executor import db_sync_to_async
+from .leaderboard import leaderboard, top_entries
+from .models import TelegramUser, UserProgress
+from .profile_sync import profile_sync
+from .progress import upsert_progress
+from .question_cache import question_cache
+from .question_pool import question_pool
+from .question_queue import STALE_QUESTION_RETRIES, question_queue
+from .selection import due_cards, question_context_annotations
+from .stats import topic_stats
+from .topic_cache import CHANNEL as TOPICS_CHANNEL, topic_cache
+from .user_cache import user_cache
 
-@sync_to_async
-def get_or_create_user(telegram_user):
-    """Get or create a TelegramUser from telegram.User object."""
-    # Get default topic (may be None if no topics exist)
-    default_topic = Topic.get_default()
-    
-    user, created = TelegramUser.objects.select_related('current_topic').get_or_create(
+
+def _create_user(telegram_user):
+    """Create a TelegramUser for a Telegram user seen for the first time."""
+    user, created = TelegramUser.objects.get_or_create(
         telegram_id=telegram_user.id,
         defaults={
             'username': telegram_user.username,
@@ -20,20 +28,83 @@ def get_or_create_user(telegram_user):
             'last_name': telegram_user.last_name,
             'language_code': telegram_user.language_code,
             'is_bot': telegram_user.is_bot,
-            'current_topic': default_topic  # Will be None if no topics exist
+            'current_topic': topic_cache.default()  # Will be None if no topics exist
         }
     )
-    # If not created, fetch with select_related
     if not created:
+        # Created concurrently by another update
         user = TelegramUser.objects.select_related('current_topic').get(telegram_id=telegram_user.id)
     return user, created
 
 
-@sync_to_async
-def get_next_question(user, topic=None, difficulty=None):
+def _remember(user, telegram_user):
+    user_cache.put(user)
+    # Queues a profile update only if Telegram sent different names
+    profile_sync.observe(user, telegram_user)
+
+
+@db_sync_to_async
+def get_or_create_user(telegram_user):
+    """
+    Get or create a TelegramUser from telegram.User object.
+    Served from the user cache when possible, otherwise one query for known users.
+    """
+    # Cached users hold their topic, pick up topic changes from other processes first
+    broadcast.check(TOPICS_CHANNEL)
+    user = user_cache.get(telegram_user.id)
+    created = False
+    if user is None:
+        user = TelegramUser.objects.select_related('current_topic').filter(telegram_id=telegram_user.id).first()
+    if user is None:
+        user, created = _create_user(telegram_user)
+    _remember(user, telegram_user)
+    return user, created
+
+
+@db_sync_to_async
+def load_question_context(telegram_user):
+    """
+    Everything ``/next`` needs in one query: the user (with current topic),
+    whether the topic's documentation was viewed and the due review question.
+
+    Returns a dict with ``user``, ``documentation_viewed`` and
+    ``due_question`` (None if nothing is due; new questions come from
+    ``get_new_question``). Cached users keep their instance, the query then
+    only evaluates the subqueries.
+    """
+    broadcast.check(TOPICS_CHANNEL)
+    annotations = question_context_annotations()
+    user = user_cache.get(telegram_user.id)
+    row = None
+    if user is not None:
+        row = TelegramUser.objects.filter(pk=user.pk).annotate(**annotations).values_list(*annotations).first()
+    if row is None:
+        user = (
+            TelegramUser.objects.select_related('current_topic')
+            .annotate(**annotations)
+            .filter(telegram_id=telegram_user.id)
+            .first()
+        )
+        if user is not None:
+            # Not kept on the (cached) instance
+            row = tuple(user.__dict__.pop(name) for name in annotations)
+    if user is None:
+        user, _ = _create_user(telegram_user)
+        row = (False, None)
+    _remember(user, telegram_user)
+
+    documentation_viewed, due_question_id = row
+    return {
+        'user': user,
+        'documentation_viewed': bool(documentation_viewed),
+        'due_question': question_cache.get(due_question_id) if due_question_id else None,
+    }
+
+
+async def get_next_question(user, topic=None, difficulty=None):
     """
     Get the next question for a user.
-    Prioritizes questions they haven't seen or got wrong.
+    Questions due for review come first, then questions they haven't seen.
     """
     # Use user's preferences if not specified
     if topic is None:
@@ -41,114 +112,129 @@ def get_next_question(user, topic=None, difficulty=None):
     if difficulty is None:
         difficulty = user.difficulty_level
 
-    # Get questions the user has answered correctly
-    correct_question_ids = QuestionHistory.objects.filter(
-        user=user,
-        is_correct=True
-    ).values_list('question_id', flat=True)
+    question = await get_due_question(user, topic, difficulty)
+    if question:
+        return question
+    return await get_new_question(user, topic, difficulty)
 
-    # Build query
-    query = Q(is_active=True)
-    if topic:
-        query &= Q(topic=topic)
-    if difficulty:
-        query &= Q(difficulty=difficulty)
 
-    # Exclude correctly answered questions
-    questions = Question.objects.filter(query).exclude(id__in=correct_question_ids).select_related('topic')
+async def get_new_question(user, topic=None, difficulty=None):
+    """Get a question the user hasn't seen, from their prefetched queue."""
+    if topic is None:
+        topic = user.current_topic
+    if difficulty is None:
+        difficulty = user.difficulty_level
 
-    if not questions.exists():
-        # If all questions are answered correctly, return a random one
-        questions = Question.objects.filter(query).select_related('topic')
+    for _ in range(STALE_QUESTION_RETRIES):
+        question_id = await question_queue.next_question_id(
+            user.id,
+            topic_id=topic.id if topic else None,
+            difficulty=difficulty,
+            rating=user.rating
+        )
+        if question_id is None:
+            return None
+        question = await get_question(question_id)
+        if question is not None:
+            return question
+        # Deactivated or deleted since it was queued: reload the pool and try again
+        question_pool.invalidate()
+        question_queue.invalidate(user.id)
+    return None
 
-    if not questions.exists():
-        return None
 
-    # Return a random question from the filtered set
-    return random.choice(list(questions))
+@db_sync_to_async
+def get_due_question(user, topic=None, difficulty=None):
+    """Get the most overdue question the user should review, if any."""
+    cards = due_cards(
+        user.id,
+        topic_id=topic.id if topic else None,
+        difficulty=difficulty
+    )
+    card = cards.select_related('question__topic').first()
+    return card.question if card else None
 
 
-@sync_to_async
-def record_answer(user, question, user_answer, is_correct):
-    """Record a user's answer to a question."""
-    # Create history entry
-    QuestionHistory.objects.create(
-        user=user,
-        question=question,
-        is_correct=is_correct,
-        user_answer=user_answer
-    )
+@db_sync_to_async
+def get_question(question_id):
+    """Get an active question by id (served from the question cache)."""
+    return question_cache.get(question_id)
 
-    # Update user progress
-    progress, created = UserProgress.objects.get_or_create(
-        user=user,
-        topic=question.topic,
-        defaults={
-            'questions_attempted': 0,
-            'questions_correct': 0
-        }
-    )
-    progress.questions_attempted += 1
-    if is_correct:
-        progress.questions_correct += 1
-    progress.save()
 
+async def record_answer(user, question, user_answer, is_correct, idempotency_key=None):
+    """
+    Record a user's answer to a question.
+    Returns False if it is a repeat of an already recorded answer.
+    """
+    if not answer_buffer.running:
+        return await db_sync_to_async(save_answer)(user, question, user_answer, is_correct, idempotency_key)
+
+    if not claim_answer_key(idempotency_key):
+        return False
+    # Written behind in batches; the in-memory state is updated right away
+    event = make_answer_event(user, question, user_answer, is_correct, idempotency_key)
+    apply_answer_event(user, question, event)
+    answer_buffer.submit(event)
+    return True
 
-@sync_to_async
+
+@db_sync_to_async
 def get_user_stats(user):
     """Get statistics for a user."""
-    total_questions = QuestionHistory.objects.filter(user=user).count()
-    correct_answers = QuestionHistory.objects.filter(user=user, is_correct=True).count()
-
-    topic_stats = UserProgress.objects.filter(user=user).select_related('topic')
+    total_questions = user.total_answered
+    correct_answers = user.total_correct
 
-    stats = {
+    return {
         'total_questions': total_questions,
         'correct_answers': correct_answers,
         'accuracy': (correct_answers / total_questions * 100) if total_questions > 0 else 0,
-        'topics': []
+        'topics': topic_stats(user)
     }
 
-    for progress in topic_stats:
-        stats['topics'].append({
-            'topic': progress.topic.name,
-            'attempted': progress.questions_attempted,
-            'correct': progress.questions_correct,
-            'accuracy': progress.accuracy
-        })
 
-    return stats
+@db_sync_to_async
+def get_leaderboard(user, topic=None, limit=10):
+    """Top users of the global (or a topic's) leaderboard and the user's own place."""
+    topic_id = topic.id if topic else None
+    return {
+        'top': top_entries(limit, topic_id),
+        'me': leaderboard.rank(user.id, topic_id),
+    }
 
 
-@sync_to_async
+@db_sync_to_async
 def get_all_topics():
     """Get all available topics."""
-    return list(Topic.objects.all().order_by('order'))
+    return topic_cache.all()
 
 
-@sync_to_async
+@db_sync_to_async
 def set_user_topic(user, topic_name):
     """Set the user's current topic."""
-    try:
-        topic = Topic.objects.get(name=topic_name)
-        user.current_topic = topic
-        user.save()
-        return topic
-    except Topic.DoesNotExist:
+    topic = topic_cache.get(name=topic_name)
+    if topic is None:
         return None
+    user.current_topic = topic
+    # Only the changed field: rating and counters are updated with F() elsewhere
+    user.save(update_fields=['current_topic', 'updated_at'])
+    user_cache.invalidate(user.telegram_id)
+    question_queue.invalidate(user.id)
+    return topic
 
 
-@sync_to_async
+@db_sync_to_async
 def set_user_difficulty(user, difficulty):
     """Set the user's difficulty level."""
     if difficulty in ['beginner', 'intermediate', 'advanced']:
         user.difficulty_level = difficulty
-        user.save()
+        user.save(update_fields=['difficulty_level', 'updated_at'])
+        user_cache.invalidate(user.telegram_id)
+        question_queue.invalidate(user.id)
         return True
     return False
 
 
-@sync_to_async
+@db_sync_to_async
 def check_documentation_viewed(user, topic):
     """Check if user has viewed documentation for a topic."""
     try:
@@ -158,26 +244,28 @@ def check_documentation_viewed(user, topic):
         return False
 
 
-@sync_to_async
+@db_sync_to_async
 def mark_documentation_viewed(user, topic):
     """Mark documentation as viewed for a topic."""
-    progress, created = UserProgress.objects.get_or_create(
-        user=user,
-        topic=topic,
-        defaults={
-            'questions_attempted': 0,
-            'questions_correct': 0
-        }
-    )
-    progress.documentation_viewed = True
-    progress.save()
-    return progress
+    upsert_progress([(user.id, topic.id, 0, 0, True)])
 
 
-@sync_to_async
+@db_sync_to_async
 def get_topic_by_id(topic_id):
     """Get topic by id."""
-    try:
-        return Topic.objects.get(id=topic_id)
-    except Topic.DoesNotExist:
-        return None
+    return topic_cache.get(topic_id)
+
+
+if getattr(settings, 'BOT_ASYNC_ORM', False):
+    # Hot helpers on the async ORM instead of the DB pool (see bot/async_db.py)
+    from .async_db import (  # noqa: F811
+        check_documentation_viewed,
+        get_due_question,
+        get_new_question,
+        get_next_question,
+        get_or_create_user,
+        get_question,
+        get_user_stats,
+        load_question_context,
+        mark_documentation_viewed,
+    )
@@ -1,6 +1,32 @@
+import hmac
+import json
+
+from django.conf import settings
 from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from telegram import Update
+
+from .webhook import telegram_webhook
+
+
+@csrf_exempt
+@require_POST
+async def webhook(request):
+    """Webhook endpoint for Telegram: queue the update for the bot and return at once"""
+    secret = settings.TELEGRAM_WEBHOOK_SECRET
+    token = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+    if not secret or not hmac.compare_digest(token, secret):
+        return JsonResponse({'error': 'Invalid secret token'}, status=403)
+
+    application = telegram_webhook.application
+    if application is None:
+        return JsonResponse({'error': 'Bot is not running in this process'}, status=503)
 
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
 
-def webhook(request):
-    """Webhook endpoint for Telegram (if needed for webhooks instead of polling)"""
+    await application.update_queue.put(Update.de_json(data, application.bot))
     return JsonResponse({'status': 'ok'})
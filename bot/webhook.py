@@ -0,0 +1,73 @@
+"""Webhook delivery: the bot application runs inside the ASGI web process."""
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramWebhook:
+    """
+    Owns the bot application of an ASGI process in webhook mode.
+
+    Started and stopped by the ASGI lifespan (see ``lifespan``); while it
+    runs, the webhook view hands every update to ``application.update_queue``
+    and returns immediately.
+    """
+
+    def __init__(self):
+        self.application = None
+
+    async def start(self):
+        # Imported here: the handlers are only needed in webhook mode
+        from bot.application import build_application, post_init
+
+        application = build_application(settings.TELEGRAM_BOT_TOKEN, webhook=True)
+        await application.initialize()
+        # post_init/post_shutdown are only called by run_polling/run_webhook
+        await post_init(application)
+        await application.start()
+        self.application = application
+        logger.info("Bot started in webhook mode")
+
+    async def stop(self):
+        application, self.application = self.application, None
+        if application is None:
+            return
+        from bot.application import post_shutdown
+
+        await application.stop()
+        await post_shutdown(application)
+        await application.shutdown()
+
+
+telegram_webhook = TelegramWebhook()
+
+
+def lifespan(app):
+    """
+    Wrap an ASGI app so the lifespan protocol starts and stops the bot.
+
+    Django's ASGI handler does not speak lifespan itself; other scopes
+    are passed through untouched.
+    """
+    async def wrapper(scope, receive, send):
+        if scope['type'] != 'lifespan':
+            return await app(scope, receive, send)
+
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await telegram_webhook.start()
+                except Exception as e:
+                    logger.exception("Failed to start the bot")
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await telegram_webhook.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    return wrapper
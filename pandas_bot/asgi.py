@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+With TELEGRAM_WEBHOOK_ENABLED the bot runs in this process too: it is
+started through the ASGI lifespan and receives updates at /bot/webhook/.
+Serve it with an ASGI server that supports lifespan, e.g.
+``uvicorn pandas_bot.asgi:application``.
 """
 
 import os
@@ -14,3 +19,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pandas_bot.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.TELEGRAM_WEBHOOK_ENABLED:
+    from bot.webhook import lifespan  # noqa: E402
+
+    application = lifespan(application)
@@ -4,6 +4,8 @@ Health check views for monitoring application status.
 from django.http import JsonResponse
 from django.db import connection
 from django.core.cache import cache
+from bot.db_executor import db_executor
+from bot.webhook import telegram_webhook
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,6 +33,13 @@ def health_check(request):
         status['status'] = 'unhealthy'
         http_status = 503
 
+    # Update processing metrics, when the bot runs in this process (webhook mode)
+    application = telegram_webhook.application
+    if application is not None:
+        status['checks']['bot'] = application.update_processor.metrics()
+        status['checks']['bot_db_pool'] = db_executor.metrics()
+        status['checks']['bot_data'] = application.data_metrics()
+
     return JsonResponse(status, status=http_status)
 
 
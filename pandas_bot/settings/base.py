@@ -94,12 +94,84 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Telegram Bot Token
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '')
 
+# Webhook mode: updates are POSTed by Telegram to /bot/webhook/ and processed by
+# the ASGI app (pandas_bot.asgi) instead of run_bot.py polling
+TELEGRAM_WEBHOOK_ENABLED = os.environ.get('TELEGRAM_WEBHOOK_ENABLED', 'False') == 'True'
+TELEGRAM_WEBHOOK_URL = os.environ.get('TELEGRAM_WEBHOOK_URL', '')
+TELEGRAM_WEBHOOK_SECRET = os.environ.get('TELEGRAM_WEBHOOK_SECRET', '')
+
+# Bot API server to talk to (empty for api.telegram.org)
+TELEGRAM_API_BASE_URL = os.environ.get('TELEGRAM_API_BASE_URL', '')
+
 # OpenAI API Key (for generating explanations if needed)
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 
 # Web App URL (for Telegram Mini App)
 WEBAPP_URL = os.environ.get('WEBAPP_URL', 'http://localhost:3000')
 
+# In-memory question pool: max number of per-user solved bitsets kept resident
+QUESTION_POOL_MAX_USERS = int(os.environ.get('QUESTION_POOL_MAX_USERS', '20000'))
+
+# Per-user prefetched question queues (refilled in the background below the low-water mark)
+QUESTION_QUEUE_SIZE = int(os.environ.get('QUESTION_QUEUE_SIZE', '10'))
+QUESTION_QUEUE_LOW_WATER = int(os.environ.get('QUESTION_QUEUE_LOW_WATER', '3'))
+QUESTION_QUEUE_MAX_USERS = int(os.environ.get('QUESTION_QUEUE_MAX_USERS', '20000'))
+
+# In-process question cache used to resolve answer callbacks (TTL in seconds)
+QUESTION_CACHE_TTL = int(os.environ.get('QUESTION_CACHE_TTL', '300'))
+QUESTION_CACHE_SIZE = int(os.environ.get('QUESTION_CACHE_SIZE', '5000'))
+
+# Stamp files announcing cache changes to other processes (used when the DB is not PostgreSQL)
+CACHE_STAMP_DIR = os.environ.get('CACHE_STAMP_DIR', str(BASE_DIR / 'data'))
+
+# Bot-side cache of TelegramUser rows (TTL in seconds)
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', '300'))
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '10000'))
+
+# Changed Telegram profiles (username, names, language) are written in batches this often (seconds)
+PROFILE_SYNC_INTERVAL = float(os.environ.get('PROFILE_SYNC_INTERVAL', '30'))
+
+# Updates handled at once; updates of the same user still run one after another
+BOT_CONCURRENT_UPDATES = int(os.environ.get('BOT_CONCURRENT_UPDATES', '32'))
+
+# Worker threads (each with its own DB connection) for the bot's database access
+BOT_DB_POOL_SIZE = int(os.environ.get('BOT_DB_POOL_SIZE', '4'))
+
+# user_data/chat_data/bot_data changes are written to the database this often (seconds)
+BOT_PERSISTENCE_INTERVAL = float(os.environ.get('BOT_PERSISTENCE_INTERVAL', '15'))
+
+# user_data and chat_data entries kept in memory each; older ones are written out and reloaded on demand
+BOT_DATA_CACHE_SIZE = int(os.environ.get('BOT_DATA_CACHE_SIZE', '10000'))
+
+# Use Django's async ORM for the bot's hot helpers (bot/async_db.py) instead of the DB pool
+BOT_ASYNC_ORM = os.environ.get('BOT_ASYNC_ORM', 'False') == 'True'
+
+# Update processing and DB pool metrics (queue depth, lock and pool waits) are logged this often (seconds, 0 = off)
+BOT_METRICS_INTERVAL = float(os.environ.get('BOT_METRICS_INTERVAL', '60'))
+
+# Per-user topic stats cache (entries are keyed by answer count, so this only bounds memory)
+TOPIC_STATS_CACHE_TTL = int(os.environ.get('TOPIC_STATS_CACHE_TTL', '3600'))
+
+# In-memory leaderboards are rebuilt from the answer counters this often (seconds)
+LEADERBOARD_REFRESH_INTERVAL = int(os.environ.get('LEADERBOARD_REFRESH_INTERVAL', '60'))
+
+# Elo ratings: K factors and the initial +/- band of question ratings around the user's rating
+RATING_K_USER = float(os.environ.get('RATING_K_USER', '32'))
+RATING_K_QUESTION = float(os.environ.get('RATING_K_QUESTION', '16'))
+RATING_BAND = float(os.environ.get('RATING_BAND', '100'))
+
+# Write-behind buffer for answers recorded by the bot: flushed every
+# ANSWER_BUFFER_FLUSH_INTERVAL seconds or every ANSWER_BUFFER_MAX_EVENTS answers,
+# with a local append log replayed on restart
+ANSWER_BUFFER_ENABLED = os.environ.get('ANSWER_BUFFER_ENABLED', 'True') == 'True'
+ANSWER_BUFFER_FLUSH_INTERVAL = float(os.environ.get('ANSWER_BUFFER_FLUSH_INTERVAL', '0.3'))
+ANSWER_BUFFER_MAX_EVENTS = int(os.environ.get('ANSWER_BUFFER_MAX_EVENTS', '200'))
+ANSWER_BUFFER_LOG_PATH = os.environ.get('ANSWER_BUFFER_LOG_PATH', str(BASE_DIR / 'data' / 'answers.log'))
+ANSWER_BUFFER_FSYNC = os.environ.get('ANSWER_BUFFER_FSYNC', 'False') == 'True'
+
+# Recently used answer idempotency keys kept in memory (older ones are caught by the DB)
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', '10000'))
+
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
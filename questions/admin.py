@@ -21,7 +21,7 @@ class QuestionDatasetInline(admin.TabularInline):
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
-    list_display = ('question_type', 'topic', 'difficulty', 'is_active', 'get_datasets_count', 'created_at')
+    list_display = ('question_type', 'topic', 'difficulty', 'rating', 'is_active', 'get_datasets_count', 'created_at')
     list_filter = ('topic', 'difficulty', 'question_type', 'is_active')
     search_fields = ('question_text', 'explanation')
     list_editable = ('is_active',)
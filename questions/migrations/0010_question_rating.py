@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-16 22:37
+
+from django.db import migrations, models
+
+from questions.models import DIFFICULTY_RATINGS
+
+
+def seed_ratings(apps, schema_editor):
+    """Start question ratings from their static difficulty."""
+    Question = apps.get_model('questions', 'Question')
+    for difficulty, rating in DIFFICULTY_RATINGS.items():
+        Question.objects.filter(difficulty=difficulty).update(rating=rating)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0009_add_datasets_with_through'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='rating',
+            field=models.FloatField(db_index=True, default=1500),
+        ),
+        migrations.RunPython(seed_ratings, migrations.RunPython.noop),
+    ]
@@ -24,6 +24,14 @@ class Topic(models.Model):
         return cls.objects.order_by('order', 'name').first()
 
 
+# Starting Elo rating of questions per difficulty (migration 0010 seeded existing ones with it)
+DIFFICULTY_RATINGS = {
+    'beginner': 1300,
+    'intermediate': 1500,
+    'advanced': 1700,
+}
+
+
 class Question(models.Model):
     """Represents a question about pandas"""
 
@@ -80,6 +88,9 @@ class Question(models.Model):
     explanation = models.TextField(help_text="Explanation of the correct answer")
     documentation_link = models.URLField(blank=True, help_text="Link to pandas documentation")
 
+    # Elo rating, updated on every answer (higher is harder)
+    rating = models.FloatField(default=1500, db_index=True)
+
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -93,6 +104,12 @@ class Question(models.Model):
     def __str__(self):
         return f"{self.topic.name} - {self.question_type} - {self.difficulty}"
 
+    def save(self, *args, **kwargs):
+        # New questions left at the default rating start from their difficulty
+        if self._state.adding and self.rating == self._meta.get_field('rating').default:
+            self.rating = DIFFICULTY_RATINGS.get(self.difficulty, self.rating)
+        super().save(*args, **kwargs)
+
     def get_options(self):
         """Return a list of non-empty options"""
         options = []
@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+"""
+Local test harness for webhook mode.
+
+Runs a fake Telegram Bot API server and replays recorded update payloads
+against the webhook endpoint, so the whole path (ASGI app -> update queue ->
+handlers -> Bot API calls) can be exercised without Telegram.
+
+    # 1. Fake Bot API (prints every call the bot makes)
+    python scripts/webhook_harness.py fake-api --port 8081
+
+    # 2. Web app in webhook mode, talking to the fake API
+    TELEGRAM_BOT_TOKEN=123:test TELEGRAM_WEBHOOK_ENABLED=True TELEGRAM_WEBHOOK_SECRET=local \\
+    TELEGRAM_API_BASE_URL=http://127.0.0.1:8081 uvicorn pandas_bot.asgi:application --port 8000
+
+    # 3. Post recorded updates
+    python scripts/webhook_harness.py replay scripts/webhook_updates.example.jsonl --secret local
+
+Updates are JSON objects, one per line, exactly as Telegram sends them.
+
+``bench`` replaces steps 1 and 3: it runs the fake Bot API itself and drives
+simulated users through /next -> answer -> next rounds, timing each step
+from posting the update until the bot's reply arrives. Run it once per
+setting to compare, e.g. BOT_ASYNC_ORM=False and BOT_ASYNC_ORM=True:
+
+    python scripts/webhook_harness.py bench --users 50 --rounds 5 --secret local
+"""
+import argparse
+import itertools
+import json
+import queue
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+BOT_USER = {'id': 123, 'is_bot': True, 'first_name': 'Pandas Bot', 'username': 'pandas_test_bot'}
+message_ids = itertools.count(1000)
+update_ids = itertools.count(1)
+# Calls the bot made, per chat (read by ``bench``)
+chat_calls = defaultdict(queue.Queue)
+
+
+def _message(params):
+    """A Message object echoing what the bot sent."""
+    chat_id = int(params.get('chat_id', 0))
+    return {
+        'message_id': int(params.get('message_id') or next(message_ids)),
+        'date': int(time.time()),
+        'chat': {'id': chat_id, 'type': 'private'},
+        'from': BOT_USER,
+        'text': params.get('text', ''),
+    }
+
+
+RESULTS = {
+    'getMe': lambda params: BOT_USER,
+    'sendMessage': _message,
+    'editMessageText': _message,
+    'editMessageReplyMarkup': _message,
+    'getWebhookInfo': lambda params: {'url': '', 'has_custom_certificate': False, 'pending_update_count': 0},
+}
+
+
+class FakeBotAPI(BaseHTTPRequestHandler):
+    """Answers every Bot API method; unknown ones return True."""
+
+    def do_POST(self):
+        method = self.path.rsplit('/', 1)[-1]
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+        if self.headers.get('Content-Type', '').startswith('application/json'):
+            params = json.loads(body or '{}')
+        else:
+            params = {key: values[0] for key, values in parse_qs(body).items()}
+
+        if not self.server.quiet:
+            print(f"-> {method} {json.dumps(params, ensure_ascii=False)[:300]}", flush=True)
+        result = RESULTS.get(method, lambda params: True)(params)
+        if params.get('chat_id'):
+            chat_calls[int(params['chat_id'])].put((method, params, result))
+        payload = json.dumps({'ok': True, 'result': result}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(host, port, quiet=False):
+    server = ThreadingHTTPServer((host, port), FakeBotAPI)
+    server.quiet = quiet
+    print(f"Fake Bot API on http://{host}:{port}", flush=True)
+    return server
+
+
+def fake_api(args):
+    _serve(args.host, args.port).serve_forever()
+
+
+def _post(url, secret, update):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(update).encode(),
+        headers={
+            'Content-Type': 'application/json',
+            'X-Telegram-Bot-Api-Secret-Token': secret,
+        },
+        method='POST'
+    )
+    with urllib.request.urlopen(request) as response:
+        return response.status
+
+
+def _buttons(params):
+    markup = params.get('reply_markup') or {}
+    if isinstance(markup, str):
+        markup = json.loads(markup)
+    return [button.get('callback_data') for row in markup.get('inline_keyboard', []) for button in row]
+
+
+class SimulatedUser:
+    """One chat answering questions; every step waits for the bot's reply."""
+
+    def __init__(self, args, user_id):
+        self.args = args
+        self.user = {'id': user_id, 'is_bot': False, 'first_name': f'Bench {user_id}', 'language_code': 'ru'}
+        self.chat = {'id': user_id, 'type': 'private', 'first_name': f'Bench {user_id}'}
+        self.calls = chat_calls[user_id]
+        self.timings = []
+        self.errors = 0
+
+    def _step(self, update, methods=('sendMessage', 'editMessageText')):
+        """Post an update, return the first reply of one of ``methods``."""
+        started = time.perf_counter()
+        _post(self.args.url, self.args.secret, {'update_id': next(update_ids), **update})
+        deadline = started + self.args.timeout
+        while True:
+            try:
+                method, params, result = self.calls.get(timeout=max(deadline - time.perf_counter(), 0))
+            except queue.Empty:
+                self.errors += 1
+                return None, None
+            if method in methods:
+                self.timings.append(time.perf_counter() - started)
+                return params, result
+
+    def _command(self, text):
+        return self._step({'message': {
+            'message_id': next(message_ids), 'date': int(time.time()), 'chat': self.chat,
+            'from': self.user, 'text': text,
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(text)}],
+        }})
+
+    def _tap(self, data, message):
+        return self._step({'callback_query': {
+            'id': str(next(update_ids)), 'from': self.user, 'chat_instance': '-1',
+            'data': data, 'message': message,
+        }})
+
+    def run(self):
+        params, message = self._command('/next')
+        for _ in range(self.args.rounds):
+            if params is None:
+                return
+            buttons = _buttons(params)
+            if 'start_testing' in buttons:
+                self._tap('start_testing', message)
+                params, message = self.calls.get(timeout=self.args.timeout)[1:]
+                buttons = _buttons(params)
+            answers = [data for data in buttons if data and data.startswith('a:')]
+            if not answers:
+                # Out of questions
+                return
+            self._tap(answers[0], message)
+            params, message = self._tap('next', message)
+
+
+def _wait_for(url, timeout):
+    """Wait until the web app answers (the webhook only accepts POST, so 405 is fine)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            urllib.request.urlopen(url)
+            return True
+        except urllib.error.HTTPError:
+            return True
+        except urllib.error.URLError:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.2)
+
+
+def bench(args):
+    host, port = args.api.rsplit(':', 1)
+    server = _serve(host, int(port), quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    if not _wait_for(args.url, args.startup_timeout):
+        print(f"{args.url} is not up")
+        return 1
+
+    users = [SimulatedUser(args, args.first_user_id + i) for i in range(args.users)]
+    threads = [threading.Thread(target=user.run) for user in users]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    timings = sorted(t * 1000 for user in users for t in user.timings)
+    errors = sum(user.errors for user in users)
+    if not timings:
+        print("No replies; is the web app running against this fake API?")
+        return 1
+    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) >= 20 else timings[-1]
+    print(f"{len(timings)} steps by {args.users} users in {elapsed:.2f} s ({len(timings) / elapsed:.1f} steps/s)")
+    print(f"latency ms: p50 {statistics.median(timings):.1f}  p95 {p95:.1f}  max {timings[-1]:.1f}")
+    print(f"timeouts: {errors}")
+    return 1 if errors else 0
+
+
+def replay(args):
+    with open(args.file, encoding='utf-8') as updates:
+        lines = [line for line in updates if line.strip()]
+
+    failures = 0
+    for line in lines:
+        request = urllib.request.Request(
+            args.url,
+            data=line.encode(),
+            headers={
+                'Content-Type': 'application/json',
+                'X-Telegram-Bot-Api-Secret-Token': args.secret,
+            },
+            method='POST'
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        elapsed = (time.perf_counter() - started) * 1000
+        failures += status != 200
+        update_id = json.loads(line).get('update_id')
+        print(f"update {update_id}: HTTP {status} in {elapsed:.1f} ms")
+        time.sleep(args.delay)
+
+    print(f"{len(lines) - failures}/{len(lines)} accepted")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    server = commands.add_parser('fake-api', help='Run a fake Telegram Bot API server')
+    server.add_argument('--host', default='127.0.0.1')
+    server.add_argument('--port', type=int, default=8081)
+
+    player = commands.add_parser('replay', help='POST recorded updates to the webhook')
+    player.add_argument('file', help='JSON lines file with one update per line')
+    player.add_argument('--url', default='http://127.0.0.1:8000/bot/webhook/')
+    player.add_argument('--secret', default='local', help='TELEGRAM_WEBHOOK_SECRET of the web app')
+    player.add_argument('--delay', type=float, default=0.2, help='Seconds between updates')
+
+    runner = commands.add_parser('bench', help='Time answer -> next rounds of simulated users')
+    runner.add_argument('--api', default='127.0.0.1:8081', help='Address for the fake Bot API')
+    runner.add_argument('--url', default='http://127.0.0.1:8000/bot/webhook/')
+    runner.add_argument('--secret', default='local', help='TELEGRAM_WEBHOOK_SECRET of the web app')
+    runner.add_argument('--users', type=int, default=50)
+    runner.add_argument('--rounds', type=int, default=5, help='Questions answered per user')
+    runner.add_argument('--first-user-id', type=int, default=5000000)
+    runner.add_argument('--timeout', type=float, default=10, help='Seconds to wait for a reply')
+    runner.add_argument('--startup-timeout', type=float, default=30, help='Seconds to wait for the web app')
+
+    args = parser.parse_args()
+    if args.command == 'fake-api':
+        fake_api(args)
+    elif args.command == 'replay':
+        sys.exit(replay(args))
+    else:
+        sys.exit(bench(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,32 +4,59 @@ import './QuestionList.css'
 
 const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000/api'
 
+const BATCH_SIZE = 10
+
 function QuestionList({ userId, topic }) {
+  const [questions, setQuestions] = useState([])
   const [question, setQuestion] = useState(null)
   const [loading, setLoading] = useState(false)
   const [answered, setAnswered] = useState(false)
   const [selectedOption, setSelectedOption] = useState(null)
+  const [result, setResult] = useState(null)
+  const [clientToken, setClientToken] = useState(null)
 
-  const loadQuestion = async () => {
-    setLoading(true)
+  const showQuestion = (nextQuestion) => {
+    setQuestion(nextQuestion)
     setAnswered(false)
     setSelectedOption(null)
+    setResult(null)
+    // Retries of this answer reuse the token, so the server records it once
+    setClientToken(crypto.randomUUID())
+  }
+
+  const loadQuestions = async () => {
+    setLoading(true)
 
     try {
-      const response = await axios.get(`${API_BASE}/questions/next/`, {
-        params: { user_id: userId, topic_id: topic?.id }
+      // One round trip for the whole session, answers come with submission
+      const response = await axios.get(`${API_BASE}/questions/batch/`, {
+        params: { user_id: userId, topic_id: topic?.id, count: BATCH_SIZE }
       })
-      setQuestion(response.data)
+      const [first, ...rest] = response.data
+      setQuestions(rest)
+      showQuestion(first || null)
     } catch (error) {
-      console.error('Error loading question:', error)
+      console.error('Error loading questions:', error)
+      setQuestions([])
+      showQuestion(null)
     } finally {
       setLoading(false)
     }
   }
 
+  const nextQuestion = () => {
+    if (questions.length === 0) {
+      loadQuestions()
+      return
+    }
+    const [first, ...rest] = questions
+    setQuestions(rest)
+    showQuestion(first)
+  }
+
   useEffect(() => {
     if (userId) {
-      loadQuestion()
+      loadQuestions()
     }
   }, [userId, topic])
 
@@ -38,11 +65,13 @@ function QuestionList({ userId, topic }) {
     setAnswered(true)
 
     try {
-      await axios.post(`${API_BASE}/questions/answer/`, {
+      const response = await axios.post(`${API_BASE}/questions/answer/`, {
         user_id: userId,
         question_id: question.id,
-        answer: option
+        answer: option,
+        client_token: clientToken
       })
+      setResult(response.data)
     } catch (error) {
       console.error('Error submitting answer:', error)
     }
@@ -81,8 +110,8 @@ function QuestionList({ userId, topic }) {
             <button
               key={letter}
               className={`option-button ${
-                answered
-                  ? letter === question.correct_option
+                result
+                  ? letter === result.correct_option
                     ? 'correct'
                     : letter === selectedOption
                     ? 'incorrect'
@@ -99,12 +128,12 @@ function QuestionList({ userId, topic }) {
         })}
       </div>
 
-      {answered && (
+      {result && (
         <div className="explanation">
           <h3>💡 Объяснение:</h3>
-          <p>{question.explanation}</p>
-          {question.documentation_link && (
-            <a href={question.documentation_link} target="_blank" rel="noopener noreferrer">
+          <p>{result.explanation}</p>
+          {result.documentation_link && (
+            <a href={result.documentation_link} target="_blank" rel="noopener noreferrer">
               📖 Документация Pandas
             </a>
           )}
@@ -112,7 +141,7 @@ function QuestionList({ userId, topic }) {
       )}
 
       {answered && (
-        <button className="next-button" onClick={loadQuestion}>
+        <button className="next-button" onClick={nextQuestion}>
           Следующий вопрос →
         </button>
       )}